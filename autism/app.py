@@ -1,20 +1,28 @@
 import streamlit as st
 st.set_page_config(page_title="Autism Detection", page_icon="🧠", layout="wide")
+import streamlit.components.v1 as components
+import startup
+from startup import Warmup
 import pandas as pd
-import numpy as np
-from keras.models import load_model
-from tensorflow.keras.preprocessing.image import img_to_array
-from tempfile import NamedTemporaryFile
-import librosa
-import tensorflow as tf
-from PIL import Image
 import os
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-import nbformat
-from nbconvert import HTMLExporter
-#import base64
-import fitz  # PyMuPDF for reading PDFs
+# TensorFlow/Keras and librosa are imported lazily (see start_warmup) so the page renders first
+from inference import (AUDIO_MODEL_PATH, audio_labels, mri_labels,
+                       as_file, format_prediction, load_audio_features, load_mri_pixels,
+                       predict_audio_batch, predict_mri_batch)
+from client import InferenceClient
+from batching import MicroBatcher
+from prediction_cache import PredictionCache, model_fingerprint
+from audio_runtime import AUDIO_BACKEND, load_audio_runtime
+from model_registry import SHARED_WEIGHTS, ModelRegistry
+from mri_runtime import MRI_BACKEND, load_mri_runtime, mri_runtime_path
+from streaming_audio import aggregate, stream_predict
+from notebook_view import NotebookRenderer
+from reports import ReportEngine, report_filename, zip_reports
+from fusion import FusionEngine
+from metrics import profiled, stage_errors, start_metrics_server, timed, timed_load
+
+# Reruns only the decorated function when a widget inside it changes (st.experimental_fragment before 1.37)
+fragment = getattr(st, "fragment", None) or st.experimental_fragment
 
 
 
@@ -91,51 +99,395 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# Load Models
+# Load Models (first call may import Keras; normally done by the background warmup).
+# The model file's fingerprint is taken before loading and kept with the model: it keys the
+# prediction cache, so a file replaced while the app runs can't take over old predictions.
 @st.cache_resource
-def load_mri_model():
-    return load_model('BC.h5', compile=False)
+def _load_mri():
+    # Keras BC.h5 by default; AUTISM_MRI_BACKEND=tflite|onnx serves an export_mri.py export instead
+    fingerprint = model_fingerprint(mri_runtime_path())
+    with timed_load("mri"):
+        return load_mri_runtime(uint8_input=True), fingerprint
 
 @st.cache_resource
+def _load_audio():
+    fingerprint = model_fingerprint(AUDIO_MODEL_PATH)
+    with timed_load("audio"):
+        return load_audio_runtime(), fingerprint
+
+def load_mri_model():
+    return _load_mri()[0]
+
 def load_audio_model():
-    return load_model('audio_classification_model.h5', compile=False)
+    return _load_audio()[0]
 
-mri_model = load_mri_model()
-audio_model = load_audio_model()
+# When AUTISM_INFERENCE_URL points at server.py the app is only a UI and never loads the models
+INFERENCE_URL = os.environ.get("AUTISM_INFERENCE_URL")
+inference_client = InferenceClient(INFERENCE_URL) if INFERENCE_URL else None
 
-# Labels
-audio_labels = {0: 'Autism', 1: 'Non-Autism'}
-mri_labels = {0: 'Autism', 1: 'Non-Autism'}
+# Shared micro-batchers: concurrent sessions are grouped into one forward pass
+@st.cache_resource
+def get_mri_batcher():
+    return MicroBatcher(load_mri_model(), name="mri-batcher")
+
+@st.cache_resource
+def get_audio_batcher():
+    return MicroBatcher(load_audio_model(), name="audio-batcher")
+
+def _import_tensorflow():
+    import tensorflow  # noqa: F401
+
+def _import_librosa():
+    import librosa  # noqa: F401
+
+# Background warmup, started once per server process after the first page is sent
+@st.cache_resource
+def start_warmup():
+    return Warmup([
+        ("import tensorflow", _import_tensorflow),
+        ("import librosa", _import_librosa),
+        (f"load {mri_runtime_path()} ({MRI_BACKEND})", get_mri_batcher),
+        (f"load {AUDIO_MODEL_PATH} ({AUDIO_BACKEND})", get_audio_batcher),
+    ])
+
+# Prediction cache shared by all sessions (memory LRU + optional AUTISM_CACHE_DIR on disk)
+@st.cache_resource
+def get_prediction_cache():
+    return PredictionCache()
+
+# Prediction callables taking (data, name) and raising on failure. The shared resources are
+# looked up here, in the script thread, so the callables can also run on the fusion threads.
+def audio_predictor():
+    if inference_client is not None:
+        return inference_client.predict_audio
+    batcher, cache, fingerprint = get_audio_batcher(), get_prediction_cache(), _load_audio()[1]
+
+    def predict(data, name):
+        result = cache.get(data, AUDIO_MODEL_PATH, fingerprint)
+        if result is None:
+            mfcc_scaled = load_audio_features(as_file(data, name))
+            result = format_prediction(batcher.predict(mfcc_scaled), audio_labels)
+            cache.put(data, AUDIO_MODEL_PATH, fingerprint, result)
+        return result
+    return predict
+
+def mri_predictor():
+    if inference_client is not None:
+        return inference_client.predict_mri
+    batcher, cache, model_path = get_mri_batcher(), get_prediction_cache(), mri_runtime_path()
+    fingerprint = _load_mri()[1]
+
+    def predict(data, name):
+        result = cache.get(data, model_path, fingerprint)
+        if result is None:
+            img = load_mri_pixels(as_file(data, name))
+            result = format_prediction(batcher.predict(img), mri_labels)
+            cache.put(data, model_path, fingerprint, result)
+        return result
+    return predict
 
 # Function to Process & Predict Audio
-def process_and_predict_audio(audio_path):
+def process_and_predict_audio(data, name="upload.wav"):
     try:
-        y, sr = librosa.load(audio_path, sr=22050, mono=True)
-        mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=40)
-        mfcc_scaled = np.mean(mfcc.T, axis=0)
-        mfcc_scaled = np.expand_dims(mfcc_scaled, axis=0)
-
-        prediction = audio_model.predict(mfcc_scaled)
-        predicted_class = int(tf.argmax(prediction, axis=-1).numpy()[0])
-        return audio_labels[predicted_class]
+        return audio_predictor()(data, name)
     except Exception as e:
+        stage_errors.inc(stage="total", pipeline="audio")
         st.error(f"Error processing audio: {e}")
         return None
 
-# Function to Process & Predict MRI
-def process_and_predict_mri(img_path):
+# Function to Process & Predict a long recording window by window, drawing the timeline as it grows
+def process_and_predict_audio_stream(data, name="upload.wav"):
     try:
-        img = Image.open(img_path).convert('RGB').resize((224, 224))
-        img = img_to_array(img) / 255.0
-        img = np.expand_dims(img, axis=0)
+        chart = st.empty()
+        timeline = []
+        for entry in stream_predict(as_file(data, name), load_audio_model()):
+            timeline.append(entry)
+            chart.line_chart(pd.DataFrame(
+                {label: [e["probabilities"][label] for e in timeline] for label in audio_labels.values()},
+                index=pd.Index([e["start"] for e in timeline], name="Time (s)")))
+        return aggregate(timeline)
+    except Exception as e:
+        st.error(f"Error processing audio: {e}")
+        return None
 
-        prediction = mri_model.predict(img)
-        predicted_class = int(tf.argmax(prediction, axis=-1).numpy()[0])
-        return mri_labels[predicted_class]
+# Function to Process & Predict MRI
+def process_and_predict_mri(data, name="upload.jpg"):
+    try:
+        return mri_predictor()(data, name)
     except Exception as e:
+        stage_errors.inc(stage="total", pipeline="mri")
         st.error(f"Error processing MRI image: {e}")
         return None
 
+# Audio-path threads shared by every session; each combined prediction runs its MRI path on its own thread
+@st.cache_resource
+def get_fusion_engine():
+    return FusionEngine()
+
+# Function to Process & Predict MRI and audio of the same subject concurrently, fused into one result
+def process_and_predict_fusion(mri_data, mri_name, audio_data, audio_name):
+    try:
+        return get_fusion_engine().predict(mri_predictor(), audio_predictor(), mri_data, audio_data,
+                                           mri_name, audio_name)
+    except Exception as e:
+        st.error(f"Error in combined prediction: {e}")
+        return None
+
+# Function to show a combined prediction with the score of each modality
+def show_fusion(result):
+    show_prediction(result)
+    timings = result["timings"]
+    st.caption(f"MRI: {result['mri']['label']} ({timings['mri_seconds']:.2f}s) | "
+               f"Audio: {result['audio']['label']} ({timings['audio_seconds']:.2f}s) | "
+               f"total {timings['total_seconds']:.2f}s")
+
+# Runs one prediction under the end-to-end timer and, when switched on in the sidebar, the profiler
+def instrumented(pipeline, predict, *args):
+    with profiled(st.session_state.get("profile_predictions", False)) as profile:
+        with timed("total", pipeline=pipeline):
+            result = predict(*args)
+    if profile["report"]:
+        with st.expander("Profile of this prediction"):
+            st.code(profile["report"])
+    return result
+
+# PDF report workers shared by all sessions (template and logo are prepared once per worker)
+@st.cache_resource
+def get_report_engine():
+    return ReportEngine()
+
+# Function to show a single prediction with its class probabilities
+def show_prediction(result):
+    st.success(f"Predicted classification: **{result['label']}**")
+    st.caption(" | ".join(f"{label}: {p:.1%}" for label, p in result["probabilities"].items()))
+
+# Function to show batch results as a table
+def show_batch_results(results):
+    rows = []
+    for result in results:
+        row = {"File": result["file"], "Prediction": result["label"]}
+        row.update(result["probabilities"] or {})
+        if result.get("error"):
+            row["Error"] = result["error"]
+        rows.append(row)
+    st.dataframe(pd.DataFrame(rows), use_container_width=True)
+
+# Notebook renderer shared by all sessions (HTML cached by content hash, converted in the background)
+@st.cache_resource
+def get_notebook_renderer():
+    return NotebookRenderer()
+
+# Function to display an uploaded notebook one page of cells at a time
+def display_notebook(data):
+    renderer = get_notebook_renderer()
+    try:
+        key, pages = renderer.open(data)
+    except Exception as e:
+        st.error(f"Could not read notebook: {e}")
+        return
+
+    page = 1
+    if pages > 1:
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1)
+    html_page = renderer.render_page(key, page - 1)
+    if page < pages:
+        renderer.render_page(key, page)  # prefetch the next page in the background
+
+    with st.spinner("Rendering notebook..."):
+        try:
+            body = html_page.result()
+        except Exception as e:
+            st.error(f"Could not render notebook: {e}")
+            return
+    components.html(body, height=800, scrolling=True)
+
+# Static page content, built once per server process instead of on every rerun
+@st.cache_data
+def doctors_markdown():
+    # Doctor Data (List of Dictionaries)
+    doctors = [
+        {"name": "Dr. Supriya Bala", "hospital": "Max Healthcare, Delhi", "specialization": "Pediatric Neurologist"},
+        {"name": "Dr. Rajesh Kumar", "hospital": "AIIMS, Delhi", "specialization": "Child Psychiatrist"},
+        {"name": "Dr. Nandini Ghosh", "hospital": "Apollo Hospitals, Kolkata", "specialization": "Developmental Pediatrician"},
+        {"name": "Dr. Aditya Sharma", "hospital": "Fortis Hospital, Bangalore", "specialization": "Pediatric Neurologist"},
+        {"name": "Dr. Meena Reddy", "hospital": "Rainbow Children's Hospital, Hyderabad", "specialization": "Autism Specialist"},
+        {"name": "Dr. Ravi Kiran", "hospital": "Manipal Hospital, Chennai", "specialization": "Pediatric Neurologist"},
+        {"name": "Dr. Pooja Verma", "hospital": "Max Healthcare, Mumbai", "specialization": "Child Psychologist"},
+        {"name": "Dr. Karthik Iyer", "hospital": "Amrita Institute, Kochi", "specialization": "Autism Therapy Expert"},
+        {"name": "Dr. Anjali Gupta", "hospital": "Medanta, Gurgaon", "specialization": "Speech & Language Therapist"},
+        {"name": "Dr. Vikram Shah", "hospital": "NIMHANS, Bangalore", "specialization": "Child Psychiatrist"},
+        {"name": "Dr. Sneha Bhat", "hospital": "Cloudnine Hospitals, Pune", "specialization": "Developmental Pediatrician"},
+        {"name": "Dr. Neeraj Kapoor", "hospital": "Apollo Hospitals, Delhi", "specialization": "Autism Specialist"},
+        {"name": "Dr. Sandeep Joshi", "hospital": "Sir Ganga Ram Hospital, Delhi", "specialization": "Pediatric Neurologist"},
+        {"name": "Dr. Anita Sharma", "hospital": "Fortis Memorial, Gurgaon", "specialization": "Child Psychologist"},
+        {"name": "Dr. Sunil Malhotra", "hospital": "Kokilaben Dhirubhai Ambani Hospital, Mumbai", "specialization": "Behavioral Therapist"},
+        {"name": "Dr. Aarti Deshmukh", "hospital": "Sahyadri Hospitals, Pune", "specialization": "Speech & Language Therapist"},
+        {"name": "Dr. Harish Prasad", "hospital": "Sri Ramachandra Medical Center, Chennai", "specialization": "Pediatric Neurologist"},
+        {"name": "Dr. Priyanka Nair", "hospital": "HCG Hospitals, Ahmedabad", "specialization": "Autism Therapy Expert"},
+        {"name": "Dr. Ramesh Choudhary", "hospital": "Max Super Specialty Hospital, Noida", "specialization": "Developmental Pediatrician"},
+        {"name": "Dr. Shruti Patel", "hospital": "Sunshine Hospitals, Hyderabad", "specialization": "Speech & Behavioral Therapist"},
+        {"name": "Dr. Dheeraj Mishra", "hospital": "Aster Medcity, Kochi", "specialization": "Child Psychiatrist"},
+        {"name": "Dr. Neha Chaturvedi", "hospital": "Tata Memorial Hospital, Mumbai", "specialization": "Neurodevelopmental Specialist"},
+        {"name": "Dr. Aniruddh Saxena", "hospital": "Jaypee Hospital, Noida", "specialization": "Pediatric Neurologist"},
+        {"name": "Dr. Rina Dutta", "hospital": "Columbia Asia Hospital, Bangalore", "specialization": "Autism Specialist"},
+        {"name": "Dr. Gopal Krishna", "hospital": "Care Hospitals, Hyderabad", "specialization": "Child Psychiatrist"},
+        {"name": "Dr. Swati Agarwal", "hospital": "Fortis Escorts Hospital, Jaipur", "specialization": "Speech & Language Therapist"},
+        {"name": "Dr. Sameer Kulkarni", "hospital": "Lilavati Hospital, Mumbai", "specialization": "Autism Therapy Expert"},
+        {"name": "Dr. Charu Gupta", "hospital": "Artemis Hospitals, Gurgaon", "specialization": "Child Neurologist"},
+        {"name": "Dr. Varun Reddy", "hospital": "MIOT International, Chennai", "specialization": "Developmental Pediatrician"},
+        {"name": "Dr. Manisha Sinha", "hospital": "Ruby Hall Clinic, Pune", "specialization": "Behavioral & Autism Specialist"},
+        {"name": "Dr. Raghavendra Singh", "hospital": "KIMS Hospitals, Hyderabad", "specialization": "Pediatric Neurologist"},
+        {"name": "Dr. Poonam Kaur", "hospital": "CMC Vellore, Tamil Nadu", "specialization": "Child Psychologist"},
+        {"name": "Dr. Naveen Sharma", "hospital": "Yashoda Hospitals, Hyderabad", "specialization": "Autism Expert"},
+        {"name": "Dr. Snehal Verma", "hospital": "Cloudnine Hospitals, Chennai", "specialization": "Developmental Therapist"},
+        {"name": "Dr. Omkar Patil", "hospital": "Breach Candy Hospital, Mumbai", "specialization": "Neurodevelopmental Specialist"},
+        {"name": "Dr. Nisha Rao", "hospital": "Sparsh Hospital, Bangalore", "specialization": "Child Neurologist"},
+        {"name": "Dr. Vishal Khanna", "hospital": "Medica Superspecialty Hospital, Kolkata", "specialization": "Pediatric Neurologist"},
+        {"name": "Dr. Madhavi Iyer", "hospital": "Manipal Hospitals, Pune", "specialization": "Speech & Autism Therapist"},
+        {"name": "Dr. Ramesh Prasad", "hospital": "HCG Cancer Center, Ahmedabad", "specialization": "Autism Behavioral Specialist"},
+        {"name": "Dr. Kiran Malhotra", "hospital": "Fortis Hospital, Mumbai", "specialization": "Autism Specialist"},
+        {"name": "Dr. Anita Kapoor", "hospital": "Rainbow Children's Hospital, Delhi", "specialization": "Developmental Pediatrician"},
+        {"name": "Dr. Pratiksha Nair", "hospital": "Gleneagles Global Hospital, Bangalore", "specialization": "Child Psychiatrist"},
+        {"name": "Dr. Vinod Gupta", "hospital": "Indraprastha Apollo Hospital, Delhi", "specialization": "Pediatric Neurologist"},
+        {"name": "Dr. Rashmi Sharma", "hospital": "Medanta - The Medicity, Gurgaon", "specialization": "Behavioral & Speech Therapist"},
+        {"name": "Dr. Lokesh Bansal", "hospital": "Nanavati Max Super Specialty, Mumbai", "specialization": "Neurodevelopmental Specialist"},
+        {"name": "Dr. Priya Menon", "hospital": "MIOT International, Chennai", "specialization": "Speech & Language Specialist"},
+        {"name": "Dr. Mohan Raj", "hospital": "Amrita Institute of Medical Sciences, Kochi", "specialization": "Autism Therapy Expert"},
+    ]
+    return "\n\n".join(f"**{d['name']}** – *{d['specialization']}*  \n🏥 {d['hospital']}\n\n---"
+                       for d in doctors)
+
+@st.cache_data
+def games_markdown():
+    games = [
+        {
+            "name": "I Never Forget a Face Memory Game",
+            "description": "Enhances memory skills and facial recognition through matching pairs.",
+            "link": "https://amzn.to/3G1Yb6L"
+        },
+        {
+            "name": "Feelmo Speaking Cards",
+            "description": "Assists in teaching emotions and feelings, helping children identify and express them.",
+            "link": "https://amzn.to/3G2Zc7H"
+        },
+        {
+            "name": "What Would You Do At School If...",
+            "description": "Encourages problem-solving skills by presenting various school scenarios.",
+            "link": "https://amzn.to/3G3Xf8I"
+        },
+        {
+            "name": "What Would You Do At Home If...",
+            "description": "Similar to the school version, this game focuses on home-based situations to develop decision-making skills.",
+            "link": "https://amzn.to/3G4Wg9J"
+        },
+        {
+            "name": "Social Skills Board Games (6 Pack)",
+            "description": "A collection of games aimed at enhancing social skills, suitable for elementary-aged children.",
+            "link": "https://amzn.to/3G5Vh0K"
+        },
+        {
+            "name": "Social Skills Chipper Chat Magnetic Game",
+            "description": "Features 30 game boards designed to teach social skills across various settings.",
+            "link": "https://amzn.to/3G6Ui1L"
+        },
+        {
+            "name": "What Do I Do? Flash Cards Game",
+            "description": "Focuses on social and emotional learning for children aged 3 and above.",
+            "link": "https://amzn.to/3G7Th2M"
+        },
+        {
+            "name": "Feelings In a Flash",
+            "description": "Cards depicting scenarios and facial expressions to help children understand emotions.",
+            "link": "https://amzn.to/3G8Si3N"
+        },
+        {
+            "name": "Counting and Sorting Game",
+            "description": "Ideal for children who enjoy organizing by colors and numbers, providing a calming experience.",
+            "link": "https://amzn.to/3G9Rh4O"
+        },
+        {
+            "name": "Yeti in My Spaghetti",
+            "description": "A fun game that promotes sensory skills and teaches turn-taking.",
+            "link": "https://amzn.to/3G0Qp5P"
+        },
+        {
+            "name": "Kinetic Sand Kit",
+            "description": "Offers a sensory-rich experience, allowing for group play and imaginative scenarios.",
+            "link": "https://amzn.to/3G1Po6Q"
+        },
+        {
+            "name": "Teachable Touchables Texture Squares",
+            "description": "A set of squares with various textures, aiding in sensory exploration and descriptive language.",
+            "link": "https://amzn.to/3G2On7R"
+        },
+        {
+            "name": "How I'm Feeling Cards",
+            "description": "Helps children identify and discuss their emotions in different situations.",
+            "link": "https://amzn.to/3G3Nm8S"
+        },
+        {
+            "name": "Mad Dragon: An Anger Control Card Game",
+            "description": "Designed for children aged 6 and up to recognize and manage feelings of anger.",
+            "link": "https://amzn.to/3G4Ml9T"
+        },
+        {
+            "name": "What Did You Say? Game",
+            "description": "A board game that enhances understanding of non-verbal cues and body language.",
+            "link": "https://amzn.to/3G5Lk0U"
+        },
+        {
+            "name": "Key Education Photo Conversation Cards",
+            "description": "Features photographs depicting social situations to teach appropriate social behaviors.",
+            "link": "https://amzn.to/3G6Kj1V"
+        },
+        {
+            "name": "Daily Routine Chart",
+            "description": "Utilizes photographs of daily activities to encourage routine and productivity.",
+            "link": "https://amzn.to/3G7Ji2W"
+        },
+        {
+            "name": "Everyday Games for Sensory Processing Disorder",
+            "description": "A book offering a variety of games tailored for children with sensory processing challenges.",
+            "link": "https://amzn.to/3G8Ih3X"
+        },
+        {
+            "name": "LEGO Classic Creative Brick Box",
+            "description": "Encourages creativity and fine motor skills with endless building possibilities.",
+            "link": "https://amzn.to/3G9Hg4Y"
+        },
+        {
+            "name": "I Spy Dig In",
+            "description": "A sensory game where children search for matching objects, enhancing visual and tactile skills.",
+            "link": "https://amzn.to/3G0Fh5Z"
+        },
+        {
+            "name": "Happy or Not? Game",
+            "description": "Focuses on recognizing and interpreting different emotions through gameplay.",
+            "link": "https://amzn.to/3G1Eg6A"
+        },
+        {
+            "name": "Let's Talk Conversation Cards",
+            "description": "Designed to open lines of communication, these cards prompt discussions on various topics.",
+            "link": "https://amzn.to/3G2Df7B"
+        }
+    ]
+    return "\n\n".join(f"### {g['name']}\n\n{g['description']}\n\n"
+                       f"[Learn more about this game]({g['link']})\n\n---" for g in games)
+
+@st.cache_data
+def video_thumbnails_markdown(video_links):
+    thumbnails = []
+    for title, link in video_links.items():
+        # Extract YouTube video ID correctly for both "youtu.be" and "youtube.com" formats
+        if "youtu.be" in link:
+            video_id = link.split("/")[-1].split("?")[0]  # Extract video ID for youtu.be links
+        elif "youtube.com" in link:
+            video_id = link.split("v=")[-1].split("&")[0]  # Extract video ID for youtube.com links
+        else:
+            continue  # Skip invalid links
+        thumbnails.append(f"[![{title}](https://img.youtube.com/vi/{video_id}/0.jpg)]({link})")
+    return "\n\n".join(thumbnails)
+
 # Header
 st.markdown("<h1>Autism Detection System 🧠🔊</h1>", unsafe_allow_html=True)
 st.image("F:/autism/autism_logo.png", width=100)
@@ -151,8 +503,9 @@ tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
     "Contact us"  # About us (Simple & professional)
 ])
 
-# Overview Section Layout
-with tab1:
+# Home tab (the search box, BMI calculator and symptom checker rerun only this tab)
+@fragment
+def home_tab():
     st.header("Home")
 
     # **Project Introduction**
@@ -258,6 +611,9 @@ with tab1:
     
     st.divider()
 
+with tab1:
+    home_tab()
+
 
 with tab2:
     st.header("Autism Library")
@@ -336,61 +692,7 @@ with tab3:
     st.divider()
     st.write("Here are some renowned doctors specializing in autism spectrum disorder treatment across India:")
     
-    # Doctor Data (List of Dictionaries)
-    doctors = [
-        {"name": "Dr. Supriya Bala", "hospital": "Max Healthcare, Delhi", "specialization": "Pediatric Neurologist"},
-        {"name": "Dr. Rajesh Kumar", "hospital": "AIIMS, Delhi", "specialization": "Child Psychiatrist"},
-        {"name": "Dr. Nandini Ghosh", "hospital": "Apollo Hospitals, Kolkata", "specialization": "Developmental Pediatrician"},
-        {"name": "Dr. Aditya Sharma", "hospital": "Fortis Hospital, Bangalore", "specialization": "Pediatric Neurologist"},
-        {"name": "Dr. Meena Reddy", "hospital": "Rainbow Children's Hospital, Hyderabad", "specialization": "Autism Specialist"},
-        {"name": "Dr. Ravi Kiran", "hospital": "Manipal Hospital, Chennai", "specialization": "Pediatric Neurologist"},
-        {"name": "Dr. Pooja Verma", "hospital": "Max Healthcare, Mumbai", "specialization": "Child Psychologist"},
-        {"name": "Dr. Karthik Iyer", "hospital": "Amrita Institute, Kochi", "specialization": "Autism Therapy Expert"},
-        {"name": "Dr. Anjali Gupta", "hospital": "Medanta, Gurgaon", "specialization": "Speech & Language Therapist"},
-        {"name": "Dr. Vikram Shah", "hospital": "NIMHANS, Bangalore", "specialization": "Child Psychiatrist"},
-        {"name": "Dr. Sneha Bhat", "hospital": "Cloudnine Hospitals, Pune", "specialization": "Developmental Pediatrician"},
-        {"name": "Dr. Neeraj Kapoor", "hospital": "Apollo Hospitals, Delhi", "specialization": "Autism Specialist"},
-        {"name": "Dr. Sandeep Joshi", "hospital": "Sir Ganga Ram Hospital, Delhi", "specialization": "Pediatric Neurologist"},
-        {"name": "Dr. Anita Sharma", "hospital": "Fortis Memorial, Gurgaon", "specialization": "Child Psychologist"},
-        {"name": "Dr. Sunil Malhotra", "hospital": "Kokilaben Dhirubhai Ambani Hospital, Mumbai", "specialization": "Behavioral Therapist"},
-        {"name": "Dr. Aarti Deshmukh", "hospital": "Sahyadri Hospitals, Pune", "specialization": "Speech & Language Therapist"},
-        {"name": "Dr. Harish Prasad", "hospital": "Sri Ramachandra Medical Center, Chennai", "specialization": "Pediatric Neurologist"},
-        {"name": "Dr. Priyanka Nair", "hospital": "HCG Hospitals, Ahmedabad", "specialization": "Autism Therapy Expert"},
-        {"name": "Dr. Ramesh Choudhary", "hospital": "Max Super Specialty Hospital, Noida", "specialization": "Developmental Pediatrician"},
-        {"name": "Dr. Shruti Patel", "hospital": "Sunshine Hospitals, Hyderabad", "specialization": "Speech & Behavioral Therapist"},
-        {"name": "Dr. Dheeraj Mishra", "hospital": "Aster Medcity, Kochi", "specialization": "Child Psychiatrist"},
-        {"name": "Dr. Neha Chaturvedi", "hospital": "Tata Memorial Hospital, Mumbai", "specialization": "Neurodevelopmental Specialist"},
-        {"name": "Dr. Aniruddh Saxena", "hospital": "Jaypee Hospital, Noida", "specialization": "Pediatric Neurologist"},
-        {"name": "Dr. Rina Dutta", "hospital": "Columbia Asia Hospital, Bangalore", "specialization": "Autism Specialist"},
-        {"name": "Dr. Gopal Krishna", "hospital": "Care Hospitals, Hyderabad", "specialization": "Child Psychiatrist"},
-        {"name": "Dr. Swati Agarwal", "hospital": "Fortis Escorts Hospital, Jaipur", "specialization": "Speech & Language Therapist"},
-        {"name": "Dr. Sameer Kulkarni", "hospital": "Lilavati Hospital, Mumbai", "specialization": "Autism Therapy Expert"},
-        {"name": "Dr. Charu Gupta", "hospital": "Artemis Hospitals, Gurgaon", "specialization": "Child Neurologist"},
-        {"name": "Dr. Varun Reddy", "hospital": "MIOT International, Chennai", "specialization": "Developmental Pediatrician"},
-        {"name": "Dr. Manisha Sinha", "hospital": "Ruby Hall Clinic, Pune", "specialization": "Behavioral & Autism Specialist"},
-        {"name": "Dr. Raghavendra Singh", "hospital": "KIMS Hospitals, Hyderabad", "specialization": "Pediatric Neurologist"},
-        {"name": "Dr. Poonam Kaur", "hospital": "CMC Vellore, Tamil Nadu", "specialization": "Child Psychologist"},
-        {"name": "Dr. Naveen Sharma", "hospital": "Yashoda Hospitals, Hyderabad", "specialization": "Autism Expert"},
-        {"name": "Dr. Snehal Verma", "hospital": "Cloudnine Hospitals, Chennai", "specialization": "Developmental Therapist"},
-        {"name": "Dr. Omkar Patil", "hospital": "Breach Candy Hospital, Mumbai", "specialization": "Neurodevelopmental Specialist"},
-        {"name": "Dr. Nisha Rao", "hospital": "Sparsh Hospital, Bangalore", "specialization": "Child Neurologist"},
-        {"name": "Dr. Vishal Khanna", "hospital": "Medica Superspecialty Hospital, Kolkata", "specialization": "Pediatric Neurologist"},
-        {"name": "Dr. Madhavi Iyer", "hospital": "Manipal Hospitals, Pune", "specialization": "Speech & Autism Therapist"},
-        {"name": "Dr. Ramesh Prasad", "hospital": "HCG Cancer Center, Ahmedabad", "specialization": "Autism Behavioral Specialist"},
-        {"name": "Dr. Kiran Malhotra", "hospital": "Fortis Hospital, Mumbai", "specialization": "Autism Specialist"},
-        {"name": "Dr. Anita Kapoor", "hospital": "Rainbow Children's Hospital, Delhi", "specialization": "Developmental Pediatrician"},
-        {"name": "Dr. Pratiksha Nair", "hospital": "Gleneagles Global Hospital, Bangalore", "specialization": "Child Psychiatrist"},
-        {"name": "Dr. Vinod Gupta", "hospital": "Indraprastha Apollo Hospital, Delhi", "specialization": "Pediatric Neurologist"},
-        {"name": "Dr. Rashmi Sharma", "hospital": "Medanta - The Medicity, Gurgaon", "specialization": "Behavioral & Speech Therapist"},
-        {"name": "Dr. Lokesh Bansal", "hospital": "Nanavati Max Super Specialty, Mumbai", "specialization": "Neurodevelopmental Specialist"},
-        {"name": "Dr. Priya Menon", "hospital": "MIOT International, Chennai", "specialization": "Speech & Language Specialist"},
-        {"name": "Dr. Mohan Raj", "hospital": "Amrita Institute of Medical Sciences, Kochi", "specialization": "Autism Therapy Expert"},
-    ]
-
-    # Display Doctors List
-    for doctor in doctors:
-        st.markdown(f"**{doctor['name']}** – *{doctor['specialization']}*  \n🏥 {doctor['hospital']}")
-        st.write("---")  # Adds a separator
+    st.markdown(doctors_markdown())
 
     st.divider()
  
@@ -405,127 +707,12 @@ with tab4:
     """)
     
 
-    games = [
-        {
-            "name": "I Never Forget a Face Memory Game",
-            "description": "Enhances memory skills and facial recognition through matching pairs.",
-            "link": "https://amzn.to/3G1Yb6L"
-        },
-        {
-            "name": "Feelmo Speaking Cards",
-            "description": "Assists in teaching emotions and feelings, helping children identify and express them.",
-            "link": "https://amzn.to/3G2Zc7H"
-        },
-        {
-            "name": "What Would You Do At School If...",
-            "description": "Encourages problem-solving skills by presenting various school scenarios.",
-            "link": "https://amzn.to/3G3Xf8I"
-        },
-        {
-            "name": "What Would You Do At Home If...",
-            "description": "Similar to the school version, this game focuses on home-based situations to develop decision-making skills.",
-            "link": "https://amzn.to/3G4Wg9J"
-        },
-        {
-            "name": "Social Skills Board Games (6 Pack)",
-            "description": "A collection of games aimed at enhancing social skills, suitable for elementary-aged children.",
-            "link": "https://amzn.to/3G5Vh0K"
-        },
-        {
-            "name": "Social Skills Chipper Chat Magnetic Game",
-            "description": "Features 30 game boards designed to teach social skills across various settings.",
-            "link": "https://amzn.to/3G6Ui1L"
-        },
-        {
-            "name": "What Do I Do? Flash Cards Game",
-            "description": "Focuses on social and emotional learning for children aged 3 and above.",
-            "link": "https://amzn.to/3G7Th2M"
-        },
-        {
-            "name": "Feelings In a Flash",
-            "description": "Cards depicting scenarios and facial expressions to help children understand emotions.",
-            "link": "https://amzn.to/3G8Si3N"
-        },
-        {
-            "name": "Counting and Sorting Game",
-            "description": "Ideal for children who enjoy organizing by colors and numbers, providing a calming experience.",
-            "link": "https://amzn.to/3G9Rh4O"
-        },
-        {
-            "name": "Yeti in My Spaghetti",
-            "description": "A fun game that promotes sensory skills and teaches turn-taking.",
-            "link": "https://amzn.to/3G0Qp5P"
-        },
-        {
-            "name": "Kinetic Sand Kit",
-            "description": "Offers a sensory-rich experience, allowing for group play and imaginative scenarios.",
-            "link": "https://amzn.to/3G1Po6Q"
-        },
-        {
-            "name": "Teachable Touchables Texture Squares",
-            "description": "A set of squares with various textures, aiding in sensory exploration and descriptive language.",
-            "link": "https://amzn.to/3G2On7R"
-        },
-        {
-            "name": "How I'm Feeling Cards",
-            "description": "Helps children identify and discuss their emotions in different situations.",
-            "link": "https://amzn.to/3G3Nm8S"
-        },
-        {
-            "name": "Mad Dragon: An Anger Control Card Game",
-            "description": "Designed for children aged 6 and up to recognize and manage feelings of anger.",
-            "link": "https://amzn.to/3G4Ml9T"
-        },
-        {
-            "name": "What Did You Say? Game",
-            "description": "A board game that enhances understanding of non-verbal cues and body language.",
-            "link": "https://amzn.to/3G5Lk0U"
-        },
-        {
-            "name": "Key Education Photo Conversation Cards",
-            "description": "Features photographs depicting social situations to teach appropriate social behaviors.",
-            "link": "https://amzn.to/3G6Kj1V"
-        },
-        {
-            "name": "Daily Routine Chart",
-            "description": "Utilizes photographs of daily activities to encourage routine and productivity.",
-            "link": "https://amzn.to/3G7Ji2W"
-        },
-        {
-            "name": "Everyday Games for Sensory Processing Disorder",
-            "description": "A book offering a variety of games tailored for children with sensory processing challenges.",
-            "link": "https://amzn.to/3G8Ih3X"
-        },
-        {
-            "name": "LEGO Classic Creative Brick Box",
-            "description": "Encourages creativity and fine motor skills with endless building possibilities.",
-            "link": "https://amzn.to/3G9Hg4Y"
-        },
-        {
-            "name": "I Spy Dig In",
-            "description": "A sensory game where children search for matching objects, enhancing visual and tactile skills.",
-            "link": "https://amzn.to/3G0Fh5Z"
-        },
-        {
-            "name": "Happy or Not? Game",
-            "description": "Focuses on recognizing and interpreting different emotions through gameplay.",
-            "link": "https://amzn.to/3G1Eg6A"
-        },
-        {
-            "name": "Let's Talk Conversation Cards",
-            "description": "Designed to open lines of communication, these cards prompt discussions on various topics.",
-            "link": "https://amzn.to/3G2Df7B"
-        }
-    ]
-
-    for game in games:
-        st.subheader(game["name"])
-        st.write(game["description"])
-        st.markdown(f"[Learn more about this game]({game['link']})")
-        st.write("---")
+    st.markdown(games_markdown())
     st.divider()
 
-with tab5:
+# Quiz tab (answering a question reruns only this tab)
+@fragment
+def quiz_tab():
     st.header("🧠 Autism & IQ Quiz")
     st.divider()
     quiz_type = st.selectbox("Select a Quiz:", ["Autism Detection Quiz", "IQ Test"])
@@ -589,17 +776,23 @@ with tab5:
         st.button("Restart IQ Test", type="primary")
     st.divider()    
 
+with tab5:
+    quiz_tab()
 
-with tab6:
+
+# Notebook viewer tab (uploads and paging rerun only this tab)
+@fragment
+def notebook_tab():
     st.header("📓 Jupyter Notebook Viewer")
 
     notebook_file = st.file_uploader("Upload a Jupyter Notebook (.ipynb)", type=["ipynb"])
     if notebook_file is not None:
-        with open("temp_notebook.ipynb", "wb") as f:
-            f.write(notebook_file.getbuffer())
-        display_notebook("temp_notebook.ipynb")
+        display_notebook(notebook_file.getbuffer())
     st.divider()
 
+with tab6:
+    notebook_tab()
+
 
 
 
@@ -652,35 +845,134 @@ with tab7:
     st.divider()
 
 
-# Main Layout
-col1, col2 = st.columns([2, 1])
-
-with col1:
+# Detection panels: each one is a fragment, so using it reruns only that panel
+@fragment
+def detection_panel():
     st.header("Upload a File for Detection")
 
     audio_file = st.file_uploader("Upload an Audio File", type=["mp3", "wav", "ogg"])
     if audio_file is not None:
         st.audio(audio_file, format='audio/wav')
-        with NamedTemporaryFile(delete=False, suffix=".wav") as temp_audio_file:
-            temp_audio_file.write(audio_file.getbuffer())
-            audio_path = temp_audio_file.name
+
+        long_recording = inference_client is None and st.checkbox(
+            "Long recording: score in 5-second windows and show a timeline")
 
         if st.button("Predict Audio"):
-            audio_result = process_and_predict_audio(audio_path)
+            if long_recording:
+                audio_result = instrumented("audio-stream", process_and_predict_audio_stream,
+                                            audio_file.getbuffer(), audio_file.name)
+            else:
+                audio_result = instrumented("audio", process_and_predict_audio,
+                                            audio_file.getbuffer(), audio_file.name)
             if audio_result:
-                st.success(f"Predicted classification: **{audio_result}**")
+                st.session_state["audio_result"] = audio_result
+                st.session_state.pop("fusion_result", None)
+                show_prediction(audio_result)
 
     img_file = st.file_uploader("Upload an MRI Image", type=["jpg", "png"])
     if img_file is not None:
         st.image(img_file, use_column_width=False)
-        with NamedTemporaryFile(delete=False, suffix=".jpg") as temp_image_file:
-            temp_image_file.write(img_file.getbuffer())
-            image_path = temp_image_file.name
 
         if st.button("Predict MRI"):
-            mri_result = process_and_predict_mri(image_path)
+            mri_result = instrumented("mri", process_and_predict_mri, img_file.getbuffer(), img_file.name)
             if mri_result:
-                st.success(f"Predicted classification: **{mri_result}**")
+                st.session_state["mri_result"] = mri_result
+                st.session_state.pop("fusion_result", None)
+                show_prediction(mri_result)
+
+@fragment
+def multimodal_panel():
+    # **🧬 Multimodal Diagnosis**: one MRI image and one audio clip of the same subject
+    st.subheader("🧬 Multimodal Diagnosis")
+    fusion_mri = st.file_uploader("MRI Image of the subject", type=["jpg", "png"], key="fusion_mri")
+    fusion_audio = st.file_uploader("Audio Recording of the subject", type=["mp3", "wav", "ogg"],
+                                    key="fusion_audio")
+    if fusion_mri is not None and fusion_audio is not None and st.button("Predict Combined"):
+        fusion_result = instrumented("fusion", process_and_predict_fusion,
+                                     fusion_mri.getbuffer(), fusion_mri.name,
+                                     fusion_audio.getbuffer(), fusion_audio.name)
+        if fusion_result:
+            st.session_state["fusion_result"] = fusion_result
+            st.session_state["mri_result"] = fusion_result["mri"]
+            st.session_state["audio_result"] = fusion_result["audio"]
+    if "fusion_result" in st.session_state:
+        show_fusion(st.session_state["fusion_result"])
+
+@fragment
+def batch_panel():
+    st.subheader("Batch Detection")
+    batch_kind = st.radio("File type", ["MRI Images", "Audio Files"], horizontal=True)
+    if batch_kind == "MRI Images":
+        batch_files = st.file_uploader("Upload MRI Images", type=["jpg", "png"],
+                                       accept_multiple_files=True)
+    else:
+        batch_files = st.file_uploader("Upload Audio Files", type=["mp3", "wav", "ogg"],
+                                       accept_multiple_files=True)
+
+    if batch_files and st.button("Predict Batch"):
+        with st.spinner(f"Classifying {len(batch_files)} files..."):
+            if inference_client is not None:
+                kind = "mri" if batch_kind == "MRI Images" else "audio"
+                batch_results = inference_client.predict_batch(kind, batch_files)
+            elif batch_kind == "MRI Images":
+                batch_results = predict_mri_batch(load_mri_model(), batch_files)
+            else:
+                batch_results = predict_audio_batch(load_audio_model(), batch_files)
+        st.session_state["batch_results"] = (batch_kind, batch_results)
+
+    if "batch_results" in st.session_state:
+        show_batch_results(st.session_state["batch_results"][1])
+
+@fragment
+def report_panel():
+    # **📄 Report Generation**
+    st.subheader("📄 Report Generation")
+    patient = st.text_input("Subject name / ID for the report")
+    # The prediction panels are separate fragments, so the results are read when a button is pressed
+    if st.button("Generate Report"):
+        if not (st.session_state.get("mri_result") or st.session_state.get("audio_result")):
+            st.info("Run an MRI, audio or combined prediction first.")
+        else:
+            record = {"patient": patient or "Unknown", "mri": st.session_state.get("mri_result"),
+                      "audio": st.session_state.get("audio_result"),
+                      "fusion": st.session_state.get("fusion_result")}
+            try:
+                _, pdf = next(get_report_engine().generate([record]))
+            except Exception as e:
+                get_report_engine.clear()  # a broken worker pool would fail every later request
+                st.error(f"Error generating report: {e}")
+            else:
+                st.download_button("Download Report (PDF)", pdf, file_name=report_filename(record),
+                                   mime="application/pdf")
+
+    if st.button("Generate Batch Reports"):
+        if "batch_results" not in st.session_state:
+            st.info("Run a batch prediction first.")
+        else:
+            kind, results = st.session_state["batch_results"]
+            field = "mri" if kind == "MRI Images" else "audio"
+            records = [{"patient": r["file"], field: r} for r in results]
+            progress = st.progress(0.0, text=f"Rendering {len(records)} reports...")
+            reports = []
+            try:
+                for done, report in enumerate(get_report_engine().generate(records), start=1):
+                    reports.append(report)
+                    progress.progress(done / len(records), text=f"Rendered {done}/{len(records)} reports")
+            except Exception as e:
+                get_report_engine.clear()
+                st.error(f"Error generating reports: {e}")
+            else:
+                st.download_button("Download Reports (ZIP)", zip_reports(reports),
+                                   file_name="autism_reports.zip", mime="application/zip")
+
+# Main Layout
+col1, col2 = st.columns([2, 1])
+
+with col1:
+    detection_panel()
+    multimodal_panel()
+    batch_panel()
+    report_panel()
 
 with col2:
     st.header("🌟 Inspirational Stories")
@@ -715,6 +1007,34 @@ with col2:
             st.write(story["description"])
             st.divider()  # Adds a sleek separator
 
+# Prometheus exporter (only when AUTISM_METRICS_PORT is set)
+@st.cache_resource
+def get_metrics_server():
+    return start_metrics_server()
+
+metrics_server = get_metrics_server()
+
+# Sidebar Inference Metrics (models warm up in the background once the page body is sent)
+if inference_client is None:
+    warmup = start_warmup()
+    with st.sidebar.expander("⚙️ Inference Metrics"):
+        if not warmup.ready.is_set():
+            st.write("Models are loading in the background…")
+        elif warmup.error is not None:
+            st.error(f"Model warmup failed: {warmup.error}")
+        else:
+            st.write("**MRI model**", get_mri_batcher().stats())
+            st.write("**Audio model**", get_audio_batcher().stats())
+            st.write("**Prediction cache**", get_prediction_cache().stats())
+            if SHARED_WEIGHTS:
+                st.write("**Shared model weights**", ModelRegistry().memory_report())
+        st.checkbox("Profile predictions", key="profile_predictions")
+        if metrics_server is not None:
+            st.caption(f"Prometheus metrics on port {metrics_server.server_port} at /metrics")
+
+with st.sidebar.expander("⏱️ Startup Timings"):
+    st.dataframe(pd.DataFrame(startup.report()), use_container_width=True)
+
 # Sidebar YouTube Video Section
 st.sidebar.header("📺 Autism Awareness Videos")
 
@@ -727,20 +1047,8 @@ video_links = {
     "How Autism Affects the Brain": "https://youtu.be/ZPyPIAHJpxI?si=ETs8xv7HDIvZ0-O2"
 }
 
-# Loop to display video thumbnails with clickable links
-for title, link in video_links.items():
-    # Extract YouTube video ID correctly for both "youtu.be" and "youtube.com" formats
-    if "youtu.be" in link:
-        video_id = link.split("/")[-1].split("?")[0]  # Extract video ID for youtu.be links
-    elif "youtube.com" in link:
-        video_id = link.split("v=")[-1].split("&")[0]  # Extract video ID for youtube.com links
-    else:
-        continue  # Skip invalid links
-
-    thumbnail_url = f"https://img.youtube.com/vi/{video_id}/0.jpg"
-
-    # Display clickable video thumbnails in the sidebar
-    st.sidebar.markdown(f"[![{title}]({thumbnail_url})]({link})", unsafe_allow_html=True)
+# Display clickable video thumbnails in the sidebar (links parsed once per process)
+st.sidebar.markdown(video_thumbnails_markdown(video_links), unsafe_allow_html=True)
 
 
 
@@ -799,3 +1107,6 @@ st.markdown("""
         </div>
     </div>
 """, unsafe_allow_html=True)
+
+# First full render of the page in this process (reported under Startup Timings)
+startup.record("first render", startup.since_start())
@@ -1,9 +1,17 @@
+import os
 import streamlit as st
 
+OVERVIEW_PATH = "F:/autism/autism_overview.txt"
+
+# Read the overview once per server process; the modification time in the key picks up edits
+@st.cache_data
+def _read_overview(path, mtime):
+    with open(path, "r", encoding="utf-8") as file:
+        return file.read()
+
 # Function to load the autism overview from file
 def load_overview():
-    with open("F:/autism/autism_overview.txt", "r", encoding="utf-8") as file:
-        return file.read()
+    return _read_overview(OVERVIEW_PATH, os.path.getmtime(OVERVIEW_PATH))
 
 # Set Streamlit page configuration
 st.set_page_config(page_title="Autism Detection", page_icon="🧠", layout="wide")
@@ -0,0 +1,149 @@
+"""MFCC feature extraction shared by training and serving.
+
+Training used to call librosa file by file inside the notebook's load_audio_data;
+the app now computes features with the same functions, so both sides agree:
+
+    from audio_features import load_audio_data
+    X, y = load_audio_data("D://autism early sathyabhama//autism//audio datasets//")
+"""
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from tempfile import NamedTemporaryFile
+
+import numpy as np
+
+from metrics import timed
+
+# Preprocessing settings (must match audio part.ipynb)
+SAMPLE_RATE = 22050
+N_MFCC = 40
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".ogg")
+AUDIO_CLASSES = ("Autism", "Non autism")  # folder names; index = label
+
+
+# Wrap raw upload bytes (bytes or a memoryview of the upload buffer) as a file object;
+# the name keeps the original extension for decoders that sniff it
+def as_file(source, name=None):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = BytesIO(source)
+        if name:
+            source.name = name
+    return source
+
+
+# Decode audio to mono float32 at SAMPLE_RATE. Paths go through librosa as before;
+# in-memory uploads are decoded by soundfile without touching the disk. Formats the
+# installed libsndfile cannot read (e.g. MP3 on older builds) fall back to a temp
+# file that is always removed afterwards.
+def decode_audio(source, sr=SAMPLE_RATE):
+    import librosa
+    import soundfile as sf
+
+    if isinstance(source, (str, os.PathLike)):
+        return librosa.load(source, sr=sr, mono=True)
+
+    source = as_file(source)
+    try:
+        y, native_sr = sf.read(source, dtype='float32', always_2d=True)
+    except RuntimeError:
+        source.seek(0)
+        suffix = os.path.splitext(getattr(source, "name", ""))[1] or ".wav"
+        tmp = NamedTemporaryFile(delete=False, suffix=suffix)
+        try:
+            with tmp:
+                tmp.write(source.read())
+            return librosa.load(tmp.name, sr=sr, mono=True)
+        finally:
+            os.remove(tmp.name)
+
+    y = librosa.to_mono(y.T)
+    if native_sr != sr:
+        y = librosa.resample(y, orig_sr=native_sr, target_sr=sr)
+    return y, sr
+
+
+# 40-dim clip descriptor: MFCCs averaged over time
+def mfcc_vector(y, sr=SAMPLE_RATE, n_mfcc=N_MFCC):
+    import librosa
+
+    mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=n_mfcc)
+    return np.mean(mfcc.T, axis=0)
+
+
+# Decode one audio clip into its 40-dim mean MFCC vector
+def load_audio_features(source):
+    with timed("decode", pipeline="audio"):
+        y, sr = decode_audio(source)
+    with timed("mfcc", pipeline="audio"):
+        return mfcc_vector(y, sr)
+
+
+# Worker entry point: never raises, so one bad file cannot stop a pool run
+def _extract_one(path):
+    try:
+        return load_audio_features(path), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+# Extract MFCC vectors for many files across a process pool into one preallocated
+# (n_files, N_MFCC) float32 array. Rows of files that failed are left as NaN and
+# reported in the returned {path: error} dict. An executor passed in is reused and left running.
+def extract_features(paths, workers=None, chunksize=4, progress=True, report_every=100, executor=None):
+    paths = list(paths)
+    features = np.full((len(paths), N_MFCC), np.nan, dtype=np.float32)
+    errors = {}
+    start = time.perf_counter()
+
+    def _report(done):
+        elapsed = time.perf_counter() - start
+        rate = done / elapsed if elapsed > 0 else 0.0
+        print(f"\rMFCC {done}/{len(paths)} files  {rate:.1f} files/s", end="", file=sys.stderr, flush=True)
+
+    own_pool = executor is None and workers != 1
+    if executor is not None:
+        results = executor.map(_extract_one, paths, chunksize=chunksize)
+    elif workers == 1:
+        results = map(_extract_one, paths)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(_extract_one, paths, chunksize=chunksize)
+    try:
+        for i, (vector, error) in enumerate(results):
+            if error is None:
+                features[i] = vector
+            else:
+                errors[paths[i]] = error
+            if progress and ((i + 1) % report_every == 0 or i + 1 == len(paths)):
+                _report(i + 1)
+    finally:
+        if own_pool:
+            pool.shutdown()
+    if progress and paths:
+        print(file=sys.stderr)
+    return features, errors
+
+
+# Files of a dataset folder laid out as <data_dir>/<class name>/<clip>, with labels
+def list_audio_dataset(data_dir, classes=AUDIO_CLASSES):
+    paths, labels = [], []
+    for label, name in enumerate(classes):
+        class_dir = os.path.join(data_dir, name)
+        for file in sorted(os.listdir(class_dir)):
+            if file.lower().endswith(AUDIO_EXTENSIONS):
+                paths.append(os.path.join(class_dir, file))
+                labels.append(label)
+    return paths, np.array(labels)
+
+
+# Parallel drop-in for load_audio_data in audio part.ipynb (files that fail to decode are skipped)
+def load_audio_data(data_dir, classes=AUDIO_CLASSES, workers=None):
+    paths, labels = list_audio_dataset(data_dir, classes)
+    X, errors = extract_features(paths, workers=workers)
+    for path, error in errors.items():
+        print(f"Skipping {path}: {error}", file=sys.stderr)
+    keep = ~np.isnan(X).any(axis=1)
+    return X[keep], labels[keep]
@@ -0,0 +1,165 @@
+"""TensorFlow-free runtime for the audio classifier.
+
+audio_classification_model.h5 is a small MLP (40 -> 128 -> 64 -> 32 -> 2,
+ReLU and softmax, dropout only during training). NumpyMLP reads its weights
+straight from the .h5 file with h5py and runs the forward pass as a few float32
+matrix multiplies. Loading takes milliseconds and a few MB instead of importing
+TensorFlow, and any batch size is served the same way:
+
+    model = load_audio_runtime()          # AUTISM_AUDIO_BACKEND=numpy (default) or keras
+    probs = model.predict_on_batch(mfcc_batch)
+
+python audio_runtime.py checks the NumPy outputs against Keras and times both.
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from inference import AUDIO_MODEL_PATH
+
+AUDIO_BACKEND = os.environ.get("AUTISM_AUDIO_BACKEND", "numpy").lower()
+
+SKIPPED_LAYERS = {"InputLayer", "Dropout"}  # identity at inference time
+
+
+def _relu(x):
+    return np.maximum(x, 0, out=x)
+
+
+def _softmax(x):
+    x -= x.max(axis=-1, keepdims=True)
+    np.exp(x, out=x)
+    x /= x.sum(axis=-1, keepdims=True)
+    return x
+
+
+def _sigmoid(x):
+    np.negative(x, out=x)
+    np.exp(x, out=x)
+    x += 1
+    return np.reciprocal(x, out=x)
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": _relu,
+    "softmax": _softmax,
+    "sigmoid": _sigmoid,
+    "tanh": lambda x: np.tanh(x, out=x),
+}
+
+
+def _decode(value):
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+# [(kernel, bias, activation name)] for every Dense layer of a Keras .h5 file, in order
+def read_dense_layers(path):
+    import h5py
+
+    with h5py.File(path, "r") as f:
+        config = json.loads(_decode(f.attrs["model_config"]))
+        weights = f["model_weights"] if "model_weights" in f else f
+        layers = []
+        for layer in config["config"]["layers"]:
+            kind, layer_config = layer["class_name"], layer["config"]
+            if kind in SKIPPED_LAYERS:
+                continue
+            if kind != "Dense":
+                raise ValueError(f"{path}: layer {layer_config.get('name')!r} ({kind}) is not supported by "
+                                 f"the NumPy runtime; use AUTISM_AUDIO_BACKEND=keras")
+            group = weights[layer_config["name"]]
+            arrays = [np.asarray(group[_decode(name)], dtype=np.float32)
+                      for name in group.attrs["weight_names"]]
+            kernel = next(a for a in arrays if a.ndim == 2)
+            bias = next((a for a in arrays if a.ndim == 1), np.zeros(kernel.shape[1], dtype=np.float32))
+            activation = layer_config.get("activation", "linear")
+            if activation not in ACTIVATIONS:
+                raise ValueError(f"{path}: activation {activation!r} is not supported by the NumPy runtime")
+            layers.append((kernel, bias, activation))
+    return layers
+
+
+# Dense stack evaluated with NumPy, behind the Keras predict_on_batch API
+class NumpyMLP:
+    def __init__(self, layers):
+        self.layers = [(np.ascontiguousarray(k), np.ascontiguousarray(b), ACTIVATIONS[a])
+                       for k, b, a in layers]
+        self.input_shape = (None, self.layers[0][0].shape[0])
+
+    @classmethod
+    def from_h5(cls, path):
+        return cls(read_dense_layers(path))
+
+    def predict_on_batch(self, batch):
+        x = np.asarray(batch, dtype=np.float32)
+        for kernel, bias, activation in self.layers:
+            x = x @ kernel
+            x += bias
+            x = activation(x)
+        return x
+
+    predict = predict_on_batch
+
+
+def load_audio_runtime(backend=AUDIO_BACKEND, path=AUDIO_MODEL_PATH):
+    if backend == "numpy":
+        from model_registry import SHARED_WEIGHTS, ModelRegistry
+        if SHARED_WEIGHTS:
+            return ModelRegistry().load_audio(path)
+        return NumpyMLP.from_h5(path)
+    if backend == "keras":
+        from serving import load_serving_model
+        return load_serving_model(path)
+    raise ValueError(f"Unknown audio backend {backend!r}, expected 'numpy' or 'keras'")
+
+
+def _throughput(model, batch, repeats):
+    model.predict_on_batch(batch)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        model.predict_on_batch(batch)
+    return repeats * len(batch) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the NumPy audio runtime against Keras")
+    parser.add_argument("--model", default=AUDIO_MODEL_PATH)
+    parser.add_argument("--samples", type=int, default=4096)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 1024])
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--atol", type=float, default=1e-4)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    numpy_model = NumpyMLP.from_h5(args.model)
+    print(f"numpy load: {1000 * (time.perf_counter() - start):.1f} ms")
+
+    start = time.perf_counter()
+    from keras.models import load_model
+    keras_model = load_model(args.model, compile=False)
+    print(f"keras import + load: {1000 * (time.perf_counter() - start):.1f} ms")
+
+    # MFCC means span roughly -500..250, so draw inputs on that scale
+    rng = np.random.default_rng(0)
+    inputs = rng.normal(0, 50, size=(args.samples, numpy_model.input_shape[1])).astype(np.float32)
+    expected = np.asarray(keras_model.predict_on_batch(inputs))
+    actual = numpy_model.predict_on_batch(inputs)
+    max_diff = float(np.abs(expected - actual).max())
+    agreement = float(np.mean(expected.argmax(-1) == actual.argmax(-1)))
+    print(f"max |keras - numpy| = {max_diff:.2e}, label agreement {agreement:.2%}")
+
+    for n in args.batch_sizes:
+        batch = inputs[:n]
+        print(f"batch={n:<5} numpy {_throughput(numpy_model, batch, args.repeats):>12.0f}/s  "
+              f"keras {_throughput(keras_model, batch, args.repeats):>12.0f}/s")
+
+    if max_diff > args.atol:
+        raise SystemExit(f"NumPy runtime differs from Keras by {max_diff:.2e} (> {args.atol})")
+
+
+if __name__ == "__main__":
+    main()
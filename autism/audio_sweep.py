@@ -0,0 +1,219 @@
+"""Cross-validated hyperparameter sweep for the audio MLP.
+
+"audio part.ipynb" trains the 40 -> 128 -> 64 -> 32 -> 2 MLP once, on a single
+80/20 split, with hand-picked widths, dropout and learning rate. This script
+scores every candidate with stratified k-fold cross-validation instead, over a
+grid (or a random sample of it) of hidden layer widths, dropout rates and
+learning rates:
+
+    python audio_sweep.py "D://autism early sathyabhama//autism//audio datasets//" \
+        --widths 128,64,32 256,128 64,32 --dropout 0.2 0.3 0.5 \
+        --learning-rate 1e-3 3e-4 --folds 5 --output sweep.csv
+
+Every (candidate, fold) pair is one job on a process pool with one TensorFlow
+thread per worker, so all cores train different models at once. MFCC vectors
+come from the feature store: the parent extracts what is missing and resolves
+the row of every clip once, and the workers only memory-map those rows, so they
+never decode audio or write to the store. Training follows the notebook (Adam,
+batch 16, up to 50 epochs, EarlyStopping on val_loss with patience 5), but the
+early-stopping set is split off the training folds so the held-out fold stays
+unseen. The candidates are printed ranked by mean held-out accuracy, together
+with the summed confusion matrix of the best ones; --output writes the ranked
+table as CSV and --json adds per-fold results and matrices.
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from audio_features import AUDIO_CLASSES, list_audio_dataset
+from feature_store import STORE_ROOT, mfcc_store, update_mfcc
+
+# The notebook's architecture and training settings
+DEFAULT_WIDTHS = ["128,64,32"]
+DEFAULT_DROPOUT = [0.3]
+DEFAULT_LEARNING_RATE = [1e-3]
+EPOCHS = 50
+BATCH_SIZE = 16
+PATIENCE = 5
+
+_dataset = None  # (X, y) in each worker process
+
+
+# Extract missing MFCCs in this process and return (store, row per clip, labels).
+# Clips that failed extraction are left out here, once, so every worker sees the same rows.
+def resolve_dataset(data_dir, root=STORE_ROOT, workers=None):
+    paths, labels = list_audio_dataset(data_dir)
+    label_of = dict(zip(paths, labels))
+    store = mfcc_store(root)
+    errors = update_mfcc(store, paths, workers)
+    kept, rows = store.lookup([p for p in paths if os.path.abspath(p) not in errors])
+    return store, rows, np.array([label_of[p] for p in kept])
+
+
+def _init_worker(data_path, shape, rows, y):
+    global _dataset
+    os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+    from serving import configure_threads
+    configure_threads(1, 1)
+    data = np.memmap(data_path, dtype=np.float32, mode="r", shape=shape)
+    _dataset = (np.asarray(data[rows]), y)
+
+
+# Sequential model of the notebook: Dropout after every hidden layer but the last
+def build_model(widths, dropout, learning_rate, n_features, n_classes):
+    from keras.layers import Dense, Dropout, Input
+    from keras.models import Sequential
+    from keras.optimizers import Adam
+
+    layers = [Input((n_features,))]
+    for i, width in enumerate(widths):
+        layers.append(Dense(width, activation='relu'))
+        if dropout and i < len(widths) - 1:
+            layers.append(Dropout(dropout))
+    layers.append(Dense(n_classes, activation='softmax'))
+    model = Sequential(layers)
+    model.compile(optimizer=Adam(learning_rate=learning_rate), loss='sparse_categorical_crossentropy',
+                  metrics=['accuracy'])
+    return model
+
+
+# Worker job: train one candidate on one fold and score it on the held-out rows
+def run_fold(config, fold, train_index, test_index, seed):
+    import keras
+    from keras.callbacks import EarlyStopping
+    from sklearn.metrics import confusion_matrix
+    from sklearn.model_selection import train_test_split
+
+    X, y = _dataset
+    keras.utils.set_random_seed(seed + fold)
+    fit_index, val_index = train_test_split(train_index, test_size=0.1, stratify=y[train_index],
+                                            random_state=seed + fold)
+    n_classes = len(AUDIO_CLASSES)
+    model = build_model(config["widths"], config["dropout"], config["learning_rate"], X.shape[1], n_classes)
+
+    start = time.perf_counter()
+    early_stopping = EarlyStopping(monitor='val_loss', patience=PATIENCE, restore_best_weights=True)
+    history = model.fit(X[fit_index], y[fit_index], validation_data=(X[val_index], y[val_index]),
+                        epochs=EPOCHS, batch_size=BATCH_SIZE, callbacks=[early_stopping], verbose=0)
+    seconds = time.perf_counter() - start
+
+    predicted = model.predict_on_batch(X[test_index]).argmax(-1)
+    return {
+        "fold": fold,
+        "accuracy": float(np.mean(predicted == y[test_index])),
+        "confusion": confusion_matrix(y[test_index], predicted, labels=range(n_classes)).tolist(),
+        "epochs": len(history.history["loss"]),
+        "seconds": seconds,
+    }
+
+
+def candidates(widths, dropouts, learning_rates, search, trials, seed):
+    grid = [{"widths": [int(w) for w in ws.split(",")], "dropout": d, "learning_rate": lr}
+            for ws, d, lr in itertools.product(widths, dropouts, learning_rates)]
+    if search == "random" and trials < len(grid):
+        rng = np.random.default_rng(seed)
+        grid = [grid[i] for i in sorted(rng.choice(len(grid), size=trials, replace=False))]
+    return grid
+
+
+def _summary(config, folds):
+    accuracies = [f["accuracy"] for f in folds]
+    confusion = np.sum([f["confusion"] for f in folds], axis=0)
+    recall = np.diag(confusion) / np.maximum(confusion.sum(axis=1), 1)
+    return {
+        "widths": "-".join(map(str, config["widths"])),
+        "dropout": config["dropout"],
+        "learning_rate": config["learning_rate"],
+        "mean_accuracy": float(np.mean(accuracies)),
+        "std_accuracy": float(np.std(accuracies)),
+        "balanced_accuracy": float(recall.mean()),
+        "mean_epochs": float(np.mean([f["epochs"] for f in folds])),
+        "train_seconds": float(np.sum([f["seconds"] for f in folds])),
+        "confusion": confusion.tolist(),
+        "folds": sorted(folds, key=lambda f: f["fold"]),
+    }
+
+
+def sweep(store, rows, y, configs, folds=5, workers=None, seed=42):
+    from sklearn.model_selection import StratifiedKFold
+
+    splits = list(StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed).split(rows, y))
+    results = {i: [] for i in range(len(configs))}
+    total, done, start = len(configs) * folds, 0, time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, initializer=_init_worker,
+                             initargs=(store.data_path, (store.rows,) + store.shape, rows, y)) as pool:
+        jobs = {pool.submit(run_fold, config, fold, train_index, test_index, seed): i
+                for i, config in enumerate(configs)
+                for fold, (train_index, test_index) in enumerate(splits)}
+        for job in as_completed(jobs):
+            results[jobs[job]].append(job.result())
+            done += 1
+            print(f"\r{done}/{total} fits  {time.perf_counter() - start:.0f} s", end="", flush=True)
+    print()
+    ranked = [_summary(configs[i], results[i]) for i in results]
+    ranked.sort(key=lambda r: (-r["mean_accuracy"], r["std_accuracy"]))
+    return ranked
+
+
+def print_confusion(result):
+    header = "true \\ predicted"
+    width = max(len(name) for name in AUDIO_CLASSES + (header,))
+    print(f"  {header:<{width}}  " + "  ".join(f"{name:>{width}}" for name in AUDIO_CLASSES))
+    for name, row in zip(AUDIO_CLASSES, result["confusion"]):
+        print(f"  {name:<{width}}  " + "  ".join(f"{n:>{width}}" for n in row))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stratified k-fold hyperparameter sweep for the audio MLP")
+    parser.add_argument("data_dir", help="folder with one sub-folder per class, as in the notebook")
+    parser.add_argument("--widths", nargs="+", default=DEFAULT_WIDTHS,
+                        help="hidden layer widths per candidate, e.g. 128,64,32 256,128")
+    parser.add_argument("--dropout", type=float, nargs="+", default=DEFAULT_DROPOUT)
+    parser.add_argument("--learning-rate", type=float, nargs="+", default=DEFAULT_LEARNING_RATE)
+    parser.add_argument("--search", choices=["grid", "random"], default="grid")
+    parser.add_argument("--trials", type=int, default=20, help="random search: candidates drawn from the grid")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None, help="training processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--store", default=STORE_ROOT)
+    parser.add_argument("--top", type=int, default=3, help="confusion matrices to print")
+    parser.add_argument("--output", help="ranked results as CSV")
+    parser.add_argument("--json", help="full results with per-fold scores and confusion matrices")
+    args = parser.parse_args()
+
+    store, rows, y = resolve_dataset(args.data_dir, args.store, args.workers)
+    configs = candidates(args.widths, args.dropout, args.learning_rate, args.search, args.trials, args.seed)
+    print(f"{len(rows)} clips, {len(configs)} candidates x {args.folds} folds")
+    ranked = sweep(store, rows, y, configs, args.folds, args.workers, args.seed)
+
+    columns = ["rank", "widths", "dropout", "learning_rate", "mean_accuracy", "std_accuracy",
+               "balanced_accuracy", "mean_epochs", "train_seconds"]
+    print(f"{'rank':>4}  {'widths':<14} {'dropout':>7} {'lr':>8} {'accuracy':>15} {'balanced':>8} {'epochs':>6}")
+    for rank, r in enumerate(ranked, 1):
+        r["rank"] = rank
+        print(f"{rank:>4}  {r['widths']:<14} {r['dropout']:>7g} {r['learning_rate']:>8g} "
+              f"{r['mean_accuracy']:>7.3f} ± {r['std_accuracy']:.3f} {r['balanced_accuracy']:>8.3f} "
+              f"{r['mean_epochs']:>6.1f}")
+    for r in ranked[:args.top]:
+        print(f"\n#{r['rank']} {r['widths']} dropout={r['dropout']:g} lr={r['learning_rate']:g}, "
+              f"summed over {args.folds} folds:")
+        print_confusion(r)
+
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(ranked)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": ranked}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
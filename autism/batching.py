@@ -0,0 +1,113 @@
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+import numpy as np
+
+from metrics import active_profile, batch_size, profiled, queue_depth, timed
+
+# Defaults can be tuned per deployment without touching the code
+MAX_BATCH_SIZE = int(os.environ.get("AUTISM_BATCH_MAX_SIZE", 32))
+MAX_WAIT_MS = float(os.environ.get("AUTISM_BATCH_MAX_WAIT_MS", 5))
+MAX_QUEUE = int(os.environ.get("AUTISM_BATCH_MAX_QUEUE", 1024))
+
+
+# Collects single-sample requests from concurrent callers and runs them as one batch.
+# A batch is flushed when it holds max_batch_size items or when the oldest item has
+# waited max_wait_ms, whichever comes first. When a request is submitted inside
+# profiled(), the forward pass of its batch is profiled on the batcher thread and the
+# report is added to that request's profile.
+class MicroBatcher:
+    def __init__(self, model, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS,
+                 max_queue=MAX_QUEUE, name="batcher"):
+        self.model = model
+        self.name = name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.requests = queue.Queue(maxsize=max_queue)
+
+        self._lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._served = 0
+        self._errors = 0
+        self._wait_total = 0.0
+        self._max_queue_depth = 0
+
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    # Queue one sample (without a batch dimension); raises queue.Full when saturated
+    def submit(self, sample):
+        future = Future()
+        self.requests.put_nowait((np.asarray(sample), future, time.perf_counter(), active_profile()))
+        depth = self.requests.qsize()
+        queue_depth.set(depth, model=self.name)
+        with self._lock:
+            self._max_queue_depth = max(self._max_queue_depth, depth)
+        return future
+
+    # Blocking helper: probabilities for one sample
+    def predict(self, sample, timeout=None):
+        return self.submit(sample).result(timeout=timeout)
+
+    def _collect(self):
+        batch = [self.requests.get()]
+        deadline = batch[0][2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            futures = [future for _, future, _, _ in batch]
+            profiles = [profile for _, _, _, profile in batch if profile is not None]
+            try:
+                inputs = np.stack([sample for sample, _, _, _ in batch])
+                with profiled(bool(profiles)) as forward:
+                    with timed("predict", model=self.name):
+                        outputs = np.asarray(self.model.predict_on_batch(inputs))
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                with self._lock:
+                    self._errors += len(batch)
+                continue
+
+            if forward["report"]:
+                title = f"{self.name}: forward pass of a batch of {len(batch)} (model time)"
+                for profile in profiles:
+                    profile["parts"].append((title, forward["report"]))
+            batch_size.observe(len(batch), model=self.name)
+            queue_depth.set(self.requests.qsize(), model=self.name)
+            for future, output in zip(futures, outputs):
+                future.set_result(output)
+            with self._lock:
+                self._batch_sizes[len(batch)] += 1
+                self._served += len(batch)
+                self._wait_total += sum(started - queued for _, _, queued, _ in batch)
+
+    # Queue depth, batch-size histogram and average queueing delay so far
+    def stats(self):
+        with self._lock:
+            batches = sum(self._batch_sizes.values())
+            return {
+                "queue_depth": self.requests.qsize(),
+                "max_queue_depth": self._max_queue_depth,
+                "requests": self._served,
+                "errors": self._errors,
+                "batches": batches,
+                "mean_batch_size": self._served / batches if batches else 0.0,
+                "batch_sizes": dict(sorted(self._batch_sizes.items())),
+                "mean_wait_ms": 1000.0 * self._wait_total / self._served if self._served else 0.0,
+            }
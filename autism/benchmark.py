@@ -0,0 +1,250 @@
+"""Offline CPU benchmark of the MRI and audio prediction paths.
+
+Generates synthetic JPEG images and WAV clips, then times every stage of the
+pipelines used by process_and_predict_mri / process_and_predict_audio:
+
+    mri:   decode -> resize -> normalize -> predict -> argmax
+    audio: decode -> mfcc -> predict -> argmax
+
+for each batch size, and reports p50/p95/p99 latency per stage, end-to-end
+throughput and peak RSS. Results are written as JSON; pass --baseline to fail
+(exit code 1) when any end-to-end p50 regresses by more than --tolerance:
+
+    python benchmark.py --batch-sizes 1 8 32 --output bench.json
+    python benchmark.py --batch-sizes 1 8 32 --baseline bench.json
+
+The MRI stages run the production preprocessing (inference.load_mri_pixels and
+scale_pixels), split into decode and resize by the stage timers those functions
+report to metrics. The numbers are for the serving fast path (JPEG draft
+decoding, uint8 batch, scaling inside the model); --legacy-preprocess measures
+full decoding and float32 scaling before the model. A baseline recorded with a
+different backend, image size, audio length or preprocessing is refused.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from audio_features import N_MFCC, decode_audio, mfcc_vector
+from inference import IMAGE_SIZE, load_mri_pixels, scale_pixels
+from metrics import stage_seconds
+from sysinfo import peak_rss_mb, reset_peak_rss
+
+
+def synthetic_jpeg(rng, size):
+    pixels = rng.integers(0, 256, size=(size[1], size[0], 3), dtype=np.uint8)
+    buffer = BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def synthetic_wav(rng, seconds, sr):
+    import soundfile as sf
+
+    t = np.arange(int(seconds * sr)) / sr
+    y = 0.3 * np.sin(2 * np.pi * rng.uniform(100, 400) * t) + 0.05 * rng.standard_normal(t.size)
+    buffer = BytesIO()
+    sf.write(buffer, y.astype(np.float32), sr, format="WAV")
+    return buffer.getvalue()
+
+
+# Collects the wall time (ms) of every call, per stage
+class StageTimer:
+    def __init__(self):
+        self.samples = {}
+
+    def time(self, stage, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        self.samples.setdefault(stage, []).append((time.perf_counter() - start) * 1000)
+        return result
+
+    def record(self, stage, ms):
+        self.samples.setdefault(stage, []).append(ms)
+
+    def summary(self, items_per_call):
+        stages = {}
+        for stage, values in self.samples.items():
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            stages[stage] = {"p50_ms": p50, "p95_ms": p95, "p99_ms": p99}
+        total = np.sum([self.samples[s] for s in self.samples], axis=0)
+        p50, p95, p99 = np.percentile(total, [50, 95, 99])
+        stages["total"] = {"p50_ms": p50, "p95_ms": p95, "p99_ms": p99,
+                           "throughput_per_s": items_per_call * 1000.0 / float(np.mean(total))}
+        return {k: {m: round(float(v), 3) for m, v in d.items()} for k, d in stages.items()}
+
+
+MRI_STAGES = ("decode", "resize")  # timed inside load_mri_pixels
+
+
+# legacy=False is the serving fast path: JPEG draft decoding, a uint8 batch buffer and the
+# cast-and-scale done by the model (load_mri_runtime(uint8_input=True)); legacy=True is the
+# full decode + float32 scaling of predict_mri_batch with a float model
+def bench_mri(model, inputs, repeats, legacy=False):
+    timer = StageTimer()
+    pixels = np.empty((len(inputs),) + IMAGE_SIZE + (3,), dtype=np.uint8)
+    batch = np.empty(pixels.shape, dtype=np.float32) if legacy else pixels
+    model.predict_on_batch(batch)  # warmup / tracing
+    for _ in range(repeats):
+        before = {stage: stage_seconds.total(stage=stage, pipeline="mri") for stage in MRI_STAGES}
+        images = [load_mri_pixels(d, draft=not legacy) for d in inputs]
+        for stage in MRI_STAGES:
+            timer.record(stage, (stage_seconds.total(stage=stage, pipeline="mri") - before[stage]) * 1000)
+
+        def normalize():
+            for i, img in enumerate(images):
+                pixels[i] = img
+            if legacy:
+                scale_pixels(pixels, out=batch)
+        timer.time("normalize", normalize)
+        probs = timer.time("predict", model.predict_on_batch, batch)
+        timer.time("argmax", np.argmax, np.asarray(probs), -1)
+    return timer.summary(len(inputs))
+
+
+def bench_audio(model, inputs, repeats):
+    timer = StageTimer()
+    batch = np.empty((len(inputs), N_MFCC), dtype=np.float32)
+    model.predict_on_batch(batch)
+    for _ in range(repeats):
+        clips = timer.time("decode", lambda: [decode_audio(BytesIO(d)) for d in inputs])
+
+        def mfcc():
+            for i, (y, sr) in enumerate(clips):
+                batch[i] = mfcc_vector(y, sr)
+        timer.time("mfcc", mfcc)
+        probs = timer.time("predict", model.predict_on_batch, batch)
+        timer.time("argmax", np.argmax, np.asarray(probs), -1)
+    return timer.summary(len(inputs))
+
+
+# Run one benchmark and add the peak RSS reached during it to its "total" stage. On Linux the
+# peak is reset first, so it is per batch size; elsewhere it is the process peak so far.
+def with_peak_rss(bench, *args):
+    reset_peak_rss()
+    summary = bench(*args)
+    summary["total"]["peak_rss_mb"] = peak_rss_mb()
+    return summary
+
+
+# Settings that change what is measured; runs that differ in any of them are not comparable
+COMPARABLE_CONFIG = ("mri_backend", "audio_backend", "image_size", "legacy_preprocess",
+                     "audio_seconds", "audio_sr")
+
+
+def config_mismatches(results, baseline):
+    now, before = results["config"], baseline.get("config", {})
+    return [f"{key}: baseline {before.get(key)!r}, now {now.get(key)!r}"
+            for key in COMPARABLE_CONFIG if key in now and key in before and now[key] != before[key]]
+
+
+# Every end-to-end p50 that is slower than baseline * (1 + tolerance)
+def find_regressions(results, baseline, tolerance):
+    regressions = []
+    for pipeline, by_batch in results["pipelines"].items():
+        for batch_size, stages in by_batch.items():
+            try:
+                before = baseline["pipelines"][pipeline][batch_size]["total"]["p50_ms"]
+            except KeyError:
+                continue
+            now = stages["total"]["p50_ms"]
+            if now > before * (1 + tolerance):
+                regressions.append(f"{pipeline} batch={batch_size}: p50 {before:.1f} ms -> {now:.1f} ms "
+                                   f"(+{100 * (now / before - 1):.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MRI and audio inference on CPU")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--image-size", type=int, nargs=2, default=[512, 512], metavar=("W", "H"))
+    parser.add_argument("--audio-seconds", type=float, default=5.0)
+    parser.add_argument("--audio-sr", type=int, default=44100,
+                        help="sample rate of the generated WAVs (resampled to 22050 Hz like uploads)")
+    parser.add_argument("--legacy-preprocess", action="store_true",
+                        help="MRI: full-resolution decode and float32 normalisation, as before the fast path")
+    parser.add_argument("--skip-mri", action="store_true")
+    parser.add_argument("--skip-audio", action="store_true")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed p50 slowdown (0.15 = 15%%)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    max_batch = max(args.batch_sizes)
+    results = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "machine": {"python": platform.python_version(), "platform": platform.platform()},
+        "pipelines": {},
+        "peak_rss_mb": {},
+    }
+    load_peaks = {}
+
+    if not args.skip_mri:
+        from mri_runtime import MRI_BACKEND, load_mri_runtime
+
+        reset_peak_rss()
+        model = load_mri_runtime(uint8_input=not args.legacy_preprocess)
+        images = [synthetic_jpeg(rng, args.image_size) for _ in range(max_batch)]
+        load_peaks["mri"] = peak_rss_mb()
+        results["config"]["mri_backend"] = MRI_BACKEND
+        results["pipelines"]["mri"] = {
+            str(n): with_peak_rss(bench_mri, model, images[:n], args.repeats, args.legacy_preprocess)
+            for n in args.batch_sizes}
+
+    if not args.skip_audio:
+        from audio_runtime import AUDIO_BACKEND, load_audio_runtime
+
+        reset_peak_rss()
+        model = load_audio_runtime()
+        results["config"]["audio_backend"] = AUDIO_BACKEND
+        clips = [synthetic_wav(rng, args.audio_seconds, args.audio_sr) for _ in range(max_batch)]
+        load_peaks["audio"] = peak_rss_mb()
+        results["pipelines"]["audio"] = {str(n): with_peak_rss(bench_audio, model, clips[:n], args.repeats)
+                                         for n in args.batch_sizes}
+
+    # Per pipeline, the peak over loading its model and inputs and all of its batch sizes
+    for pipeline, by_batch in results["pipelines"].items():
+        peaks = [load_peaks[pipeline]] + [s["total"]["peak_rss_mb"] for s in by_batch.values()]
+        results["peak_rss_mb"][pipeline] = max(p or 0 for p in peaks)
+
+    for pipeline, by_batch in results["pipelines"].items():
+        for batch_size, stages in by_batch.items():
+            cells = "  ".join(f"{stage}={s['p50_ms']:.1f}/{s['p95_ms']:.1f}/{s['p99_ms']:.1f}"
+                              for stage, s in stages.items())
+            print(f"{pipeline:<5} batch={batch_size:<3} {stages['total']['throughput_per_s']:8.1f}/s  "
+                  f"peak RSS {stages['total']['peak_rss_mb'] or 0:6.0f} MB  p50/p95/p99 ms: {cells}")
+    for pipeline, peak in results["peak_rss_mb"].items():
+        print(f"{pipeline} peak RSS: {peak:.0f} MB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        mismatches = config_mismatches(results, baseline)
+        if mismatches:
+            print(f"\nNot comparable with {args.baseline}; rerun with the same settings:", file=sys.stderr)
+            for line in mismatches:
+                print("  " + line, file=sys.stderr)
+            sys.exit(2)
+        regressions = find_regressions(results, baseline, args.tolerance)
+        if regressions:
+            print("\nPERFORMANCE REGRESSION against " + args.baseline, file=sys.stderr)
+            for line in regressions:
+                print("  " + line, file=sys.stderr)
+            sys.exit(1)
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import json
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+
+
+class InferenceServerError(RuntimeError):
+    pass
+
+
+# Thin HTTP client for server.py, used by the Streamlit app
+class InferenceClient:
+    def __init__(self, base_url, timeout=120):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _post(self, endpoint, data, name):
+        request = Request(f"{self.base_url}{endpoint}?name={quote(name)}", data=bytes(data),
+                          headers={"Content-Type": "application/octet-stream"}, method="POST")
+        try:
+            with urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except HTTPError as e:
+            try:
+                message = json.loads(e.read()).get("error", e.reason)
+            except ValueError:
+                message = e.reason
+            raise InferenceServerError(f"{e.code}: {message}") from None
+
+    def predict_mri(self, data, name="upload"):
+        return self._post("/predict/mri", data, name)
+
+    def predict_audio(self, data, name="upload"):
+        return self._post("/predict/audio", data, name)
+
+    # Same result format as inference.predict_*_batch, one request per file
+    def predict_batch(self, kind, files):
+        predict = self.predict_mri if kind == "mri" else self.predict_audio
+        results = []
+        for file in files:
+            try:
+                results.append(predict(file.getvalue(), file.name))
+            except InferenceServerError as e:
+                results.append({"file": file.name, "label": None, "probabilities": None,
+                                "error": str(e)})
+        return results
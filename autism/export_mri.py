@@ -0,0 +1,179 @@
+"""Export BC.h5 to optimized CPU runtimes and compare them with Keras.
+
+    python export_mri.py --formats tflite tflite-fp16 tflite-int8 onnx \
+        --parity-dir "D:/autism early sathyabhama/autism/autsim mri/VAL"
+
+Writes BC.tflite, BC_fp16.tflite, BC_int8.tflite and BC.onnx next to BC.h5 (or
+into --out-dir), then reports for every backend the prediction agreement and
+accuracy against the Keras model on the held-out folder, single-image and
+batched latency, and the memory added by loading it. Serve one of them with
+AUTISM_MRI_BACKEND=tflite|onnx and AUTISM_MRI_RUNTIME_PATH=<file>.
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from inference import IMAGE_SIZE, MRI_EXTENSIONS, MRI_MODEL_PATH, collect_files, load_mri_image
+from mri_runtime import OnnxModel, TFLiteModel
+from sysinfo import rss_mb
+
+FORMATS = ("tflite", "tflite-fp16", "tflite-int8", "onnx")
+
+
+def export_tflite(model, out_path, quantization=None):
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantization == "fp16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == "int8":
+        # Dynamic-range quantization: int8 weights, float activations, no calibration data
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    with open(out_path, "wb") as f:
+        f.write(converter.convert())
+    return out_path
+
+
+def export_onnx(model, out_path):
+    import tensorflow as tf
+    import tf2onnx
+
+    spec = (tf.TensorSpec((None,) + IMAGE_SIZE + (3,), tf.float32, name="input"),)
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=13, output_path=out_path)
+    return out_path
+
+
+def export_all(model, formats, out_dir, stem):
+    paths = {}
+    for fmt in formats:
+        if fmt == "onnx":
+            paths[fmt] = export_onnx(model, os.path.join(out_dir, f"{stem}.onnx"))
+        else:
+            quantization = fmt.partition("-")[2] or None
+            suffix = f"_{quantization}" if quantization else ""
+            paths[fmt] = export_tflite(model, os.path.join(out_dir, f"{stem}{suffix}.tflite"), quantization)
+        print(f"Exported {fmt:<12} -> {paths[fmt]} ({os.path.getsize(paths[fmt]) / 2**20:.1f} MB)")
+    return paths
+
+
+# Held-out images plus their class index (sorted sub-folder order, as flow_from_directory does).
+# Up to limit // n_classes images are taken from every class, so all classes are represented.
+def load_parity_set(folder, limit):
+    classes = sorted(d for d in os.listdir(folder) if os.path.isdir(os.path.join(folder, d)))
+    if classes:
+        per_class = max(1, limit // len(classes))
+        files = [path for name in classes
+                 for path in sorted(collect_files(os.path.join(folder, name), MRI_EXTENSIONS))[:per_class]]
+    else:
+        files = sorted(collect_files(folder, MRI_EXTENSIONS))[:limit]
+    images = np.empty((len(files),) + IMAGE_SIZE + (3,), dtype=np.float32)
+    for i, path in enumerate(files):
+        images[i] = load_mri_image(path)
+
+    labels = None
+    if classes:
+        parent = [os.path.basename(os.path.dirname(path)) for path in files]
+        labels = np.array([classes.index(name) if name in classes else -1 for name in parent])
+    return images, labels
+
+
+def predict_all(model, images, batch_size):
+    return np.concatenate([np.asarray(model.predict_on_batch(images[i:i + batch_size]))
+                           for i in range(0, len(images), batch_size)])
+
+
+def time_latency(model, images, batch_size, repeats):
+    batch = images[:batch_size]
+    model.predict_on_batch(batch)  # warmup
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_on_batch(batch)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def compare_backends(keras_model, backends, images, labels, batch_size, repeats):
+    reference = predict_all(keras_model, images, batch_size)
+    results = []
+    for name, (model, load_mb) in backends.items():
+        outputs = reference if model is keras_model else predict_all(model, images, batch_size)
+        row = {
+            "backend": name,
+            "agreement": float(np.mean(outputs.argmax(-1) == reference.argmax(-1))),
+            "max_abs_diff": float(np.max(np.abs(outputs - reference))),
+            "latency_ms_batch1": time_latency(model, images, 1, repeats),
+            f"latency_ms_batch{batch_size}": time_latency(model, images, batch_size, repeats),
+            "load_rss_mb": load_mb,
+        }
+        if labels is not None:
+            known = labels >= 0
+            row["accuracy"] = float(np.mean(outputs.argmax(-1)[known] == labels[known]))
+        results.append(row)
+    return results
+
+
+# Load a model and measure how much resident memory it added
+def _load_measured(loader, *args):
+    before = rss_mb()
+    model = loader(*args)
+    after = rss_mb()
+    return model, (after - before if before is not None and after is not None else None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export BC.h5 to TFLite/ONNX and check parity")
+    parser.add_argument("--model", default=MRI_MODEL_PATH)
+    parser.add_argument("--out-dir", default=None, help="defaults to the folder of --model")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--parity-dir", help="held-out image folder (e.g. the VAL split)")
+    parser.add_argument("--limit", type=int, default=256, help="max parity images")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--min-agreement", type=float, default=0.98,
+                        help="fail if any backend agrees with Keras on fewer predictions than this")
+    args = parser.parse_args()
+
+    from keras.models import load_model
+
+    keras_model, keras_mb = _load_measured(lambda path: load_model(path, compile=False), args.model)
+    out_dir = args.out_dir or os.path.dirname(os.path.abspath(args.model))
+    os.makedirs(out_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(args.model))[0]
+    paths = export_all(keras_model, args.formats, out_dir, stem)
+
+    if args.parity_dir:
+        images, labels = load_parity_set(args.parity_dir, args.limit)
+        if len(images) == 0:
+            parser.error(f"No images found in {args.parity_dir}")
+    else:
+        print("No --parity-dir given: comparing on random inputs (agreement only, no accuracy)")
+        images = np.random.default_rng(0).random((args.batch_size,) + IMAGE_SIZE + (3,), dtype=np.float32)
+        labels = None
+
+    backends = {"keras": (keras_model, keras_mb)}
+    for fmt, path in paths.items():
+        loader = OnnxModel if fmt == "onnx" else TFLiteModel
+        backends[fmt] = _load_measured(loader, path)
+
+    results = compare_backends(keras_model, backends, images, labels,
+                               min(args.batch_size, len(images)), args.repeats)
+    for row in results:
+        print("  ".join(f"{k}={v:.4f}" if isinstance(v, float) else f"{k}={v}" for k, v in row.items()))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"model": args.model, "images": len(images), "results": results}, f, indent=2)
+
+    failed = [f"{row['backend']} ({row['agreement']:.2%})" for row in results
+              if row["agreement"] < args.min_agreement]
+    if failed:
+        raise SystemExit(f"Agreement with Keras below {args.min_agreement:.2%}: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""Persistent, memory-mappable store for precomputed features.
+
+Each store is one folder holding a raw row file (data.bin) and an index
+(index.json) that maps every source file to its row together with the file's
+mtime and size. The folder name includes a hash of the extraction parameters,
+so changing e.g. n_mfcc or the image size starts a fresh store instead of
+mixing incompatible rows. Rows are only ever appended: new or modified files
+get a new row, unchanged files are never decoded again. Missing rows are
+computed and appended AUTISM_FEATURE_CHUNK files at a time, so memory stays
+bounded on large datasets and an interrupted run keeps every finished chunk.
+
+    X, y = load_audio_dataset("D://.../audio datasets//")      # MFCC vectors
+    X, y = load_mri_split("D://.../autsim mri/TRAIN/")           # uint8 224x224x3
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from audio_features import AUDIO_CLASSES, N_MFCC, SAMPLE_RATE, extract_features, list_audio_dataset
+from inference import IMAGE_SIZE, MRI_EXTENSIONS, load_mri_pixels
+
+STORE_ROOT = os.environ.get("AUTISM_FEATURE_STORE", "feature_store")
+UPDATE_CHUNK = int(os.environ.get("AUTISM_FEATURE_CHUNK", 256))  # files computed per append
+
+
+def _params_hash(params):
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+class FeatureStore:
+    def __init__(self, kind, shape, dtype, params, root=STORE_ROOT):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.params = params
+        self.folder = os.path.join(root, f"{kind}-{_params_hash(params)}")
+        self.data_path = os.path.join(self.folder, "data.bin")
+        self.index_path = os.path.join(self.folder, "index.json")
+        os.makedirs(self.folder, exist_ok=True)
+
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.index = json.load(f)["files"]
+        self._row_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+
+    @property
+    def rows(self):
+        return os.path.getsize(self.data_path) // self._row_bytes if os.path.exists(self.data_path) else 0
+
+    # Read-only view over every stored row; nothing is loaded until it is indexed
+    def array(self):
+        if self.rows == 0:
+            return np.empty((0,) + self.shape, dtype=self.dtype)
+        return np.memmap(self.data_path, dtype=self.dtype, mode="r", shape=(self.rows,) + self.shape)
+
+    def _is_fresh(self, path, st):
+        entry = self.index.get(path)
+        return entry is not None and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size
+
+    def _save_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"params": self.params, "shape": self.shape, "dtype": self.dtype.str,
+                       "files": self.index}, f)
+        os.replace(tmp_path, self.index_path)
+
+    # Make sure every path has an up-to-date row; compute(paths) -> (array, {path: error})
+    # is only called for files that are new or changed since they were stored, at most
+    # chunk_size of them at a time, and each chunk is on disk before the next is computed.
+    def update(self, paths, compute, chunk_size=UPDATE_CHUNK):
+        paths = [os.path.abspath(p) for p in paths]
+        stats = {p: os.stat(p) for p in paths}
+        stale = [p for p in paths if not self._is_fresh(p, stats[p])]
+
+        errors = {}
+        for start in range(0, len(stale), chunk_size):
+            chunk = stale[start:start + chunk_size]
+            values, chunk_errors = compute(chunk)
+            errors.update(chunk_errors)
+            next_row = self.rows
+            with open(self.data_path, "ab") as f:
+                # Drop a partial row left by an interrupted write, or every later row would be shifted
+                f.truncate(next_row * self._row_bytes)
+                for path, value in zip(chunk, values):
+                    if path in chunk_errors:
+                        continue
+                    f.write(np.ascontiguousarray(value, dtype=self.dtype).tobytes())
+                    st = stats[path]
+                    self.index[path] = {"row": next_row, "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+                    next_row += 1
+            self._save_index()
+        return errors
+
+    # Row numbers for paths (files that could not be processed are omitted)
+    def lookup(self, paths):
+        found, rows = [], []
+        for path in paths:
+            entry = self.index.get(os.path.abspath(path))
+            if entry is not None:
+                found.append(path)
+                rows.append(entry["row"])
+        return found, np.array(rows, dtype=np.int64)
+
+    # Features for paths in order, computing only what is missing; returns (paths kept, array)
+    def load(self, paths, compute, chunk_size=UPDATE_CHUNK):
+        errors = self.update(paths, compute, chunk_size)
+        return self.read([p for p in paths if os.path.abspath(p) not in errors])
+
+    # Stored features for paths in order, without computing anything; returns (paths kept, array).
+    # When the rows are stored contiguously (the usual case) the array is a memmap slice,
+    # so nothing is read from disk until it is used.
+    def read(self, paths):
+        kept, rows = self.lookup(paths)
+        data = self.array()
+        if len(rows) and np.array_equal(rows, np.arange(rows[0], rows[0] + len(rows))):
+            return kept, data[rows[0]:rows[0] + len(rows)]
+        return kept, data[rows]
+
+
+def mfcc_store(root=STORE_ROOT):
+    return FeatureStore("mfcc", (N_MFCC,), np.float32,
+                        {"sr": SAMPLE_RATE, "n_mfcc": N_MFCC, "pooling": "mean"}, root)
+
+
+# MRI images are stored as resized uint8 pixels (4x smaller than float32); scale by 1/255 when reading
+def mri_store(root=STORE_ROOT):
+    return FeatureStore("mri", IMAGE_SIZE + (3,), np.uint8,
+                        {"size": list(IMAGE_SIZE), "mode": "RGB", "resample": "PIL-default"}, root)
+
+
+def _compute_mri(paths):
+    pixels = np.empty((len(paths),) + IMAGE_SIZE + (3,), dtype=np.uint8)
+    errors = {}
+    for i, path in enumerate(paths):
+        try:
+            pixels[i] = load_mri_pixels(path, draft=False)
+        except Exception as e:
+            errors[path] = f"{type(e).__name__}: {e}"
+    return pixels, errors
+
+
+# Add missing MFCC rows, with one process pool shared by every chunk; returns {path: error}
+def update_mfcc(store, paths, workers=None):
+    pool = ProcessPoolExecutor(max_workers=workers) if workers != 1 else None
+    try:
+        return store.update(paths, lambda stale: extract_features(stale, workers=workers, executor=pool))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+# Cached version of audio_features.load_audio_data
+def load_audio_dataset(data_dir, classes=AUDIO_CLASSES, root=STORE_ROOT, workers=None):
+    paths, labels = list_audio_dataset(data_dir, classes)
+    label_of = dict(zip(paths, labels))
+    store = mfcc_store(root)
+    errors = update_mfcc(store, paths, workers)
+    kept, X = store.read([p for p in paths if os.path.abspath(p) not in errors])
+    return X, np.array([label_of[p] for p in kept])
+
+
+# (paths, labels, class names) for one TRAIN/TEST/VAL folder; labels follow the sorted
+# class sub-folders, the same mapping flow_from_directory uses
+def list_mri_split(split_dir):
+    classes = sorted(d for d in os.listdir(split_dir) if os.path.isdir(os.path.join(split_dir, d)))
+    paths, labels = [], []
+    for label, name in enumerate(classes):
+        class_dir = os.path.join(split_dir, name)
+        for file in sorted(os.listdir(class_dir)):
+            if file.lower().endswith(MRI_EXTENSIONS):
+                paths.append(os.path.join(class_dir, file))
+                labels.append(label)
+    return paths, np.array(labels), classes
+
+
+# One TRAIN/TEST/VAL folder as (uint8 images, labels)
+def load_mri_split(split_dir, root=STORE_ROOT):
+    paths, labels, _ = list_mri_split(split_dir)
+    label_of = dict(zip(paths, labels))
+    kept, X = mri_store(root).load(paths, _compute_mri)
+    return X, np.array([label_of[p] for p in kept])
@@ -0,0 +1,144 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+from audio_features import AUDIO_EXTENSIONS, N_MFCC, as_file, load_audio_features
+from metrics import timed
+
+# Labels
+audio_labels = {0: 'Autism', 1: 'Non-Autism'}
+mri_labels = {0: 'Autism', 1: 'Non-Autism'}
+
+# Model files (relative to the autism/ folder, like the training notebooks save them)
+MRI_MODEL_PATH = os.environ.get("AUTISM_MRI_MODEL", "BC.h5")
+AUDIO_MODEL_PATH = os.environ.get("AUTISM_AUDIO_MODEL", "audio_classification_model.h5")
+
+# Preprocessing settings (must match the training notebooks)
+IMAGE_SIZE = (224, 224)
+BATCH_SIZE = 32
+
+MRI_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+# Serving decodes large JPEGs at a reduced DCT scale (PIL draft mode); AUTISM_JPEG_DRAFT=0 turns it off
+JPEG_DRAFT = os.environ.get("AUTISM_JPEG_DRAFT", "1") != "0"
+PIXEL_SCALE = np.float32(1.0 / 255.0)
+
+
+# Expand a directory (or a list of files/directories) into a sorted list of files
+def collect_files(sources, extensions):
+    if isinstance(sources, (str, os.PathLike)):
+        sources = [sources]
+
+    files = []
+    for source in sources:
+        if isinstance(source, (str, os.PathLike)) and os.path.isdir(source):
+            for root, _, names in os.walk(source):
+                for name in sorted(names):
+                    if name.lower().endswith(extensions):
+                        files.append(os.path.join(root, name))
+        else:
+            files.append(source)
+    return files
+
+
+# Name to report for a path or an uploaded file object
+def source_name(source):
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    return getattr(source, "name", repr(source))
+
+
+# Decode one MRI image into (224, 224, 3) uint8 RGB pixels. With draft=True a large JPEG
+# is decoded at the smallest DCT scale (1/2, 1/4 or 1/8) that keeps it at least twice the
+# target size, which skips most of the decode work before the final resize.
+def load_mri_pixels(source, draft=JPEG_DRAFT):
+    with timed("decode", pipeline="mri"):
+        img = Image.open(as_file(source))
+        if draft and img.format == "JPEG":
+            img.draft("RGB", (2 * IMAGE_SIZE[0], 2 * IMAGE_SIZE[1]))
+        img.load()  # PIL decodes lazily; without this the decode time lands in "resize"
+        if img.mode != "RGB":
+            img = img.convert('RGB')
+    with timed("resize", pipeline="mri"):
+        if img.size != IMAGE_SIZE:
+            img = img.resize(IMAGE_SIZE)
+        return np.asarray(img, dtype=np.uint8)
+
+
+# uint8 pixels -> float32 in [0, 1] as one fused cast-and-scale pass, into out when given
+def scale_pixels(pixels, out=None):
+    return np.multiply(pixels, PIXEL_SCALE, out=out, dtype=np.float32)
+
+
+# Decode one MRI image into a (224, 224, 3) float32 array scaled to [0, 1]
+def load_mri_image(source):
+    pixels = load_mri_pixels(source)
+    with timed("normalize", pipeline="mri"):
+        return scale_pixels(pixels)
+
+
+# Decode every source into one preallocated array, skipping files that fail;
+# returns (array, source index of every row, {source index: error})
+def _decode_all(sources, decode, shape, dtype=np.float32):
+    batch = np.empty((len(sources),) + shape, dtype=dtype)
+    ok, errors = [], {}
+    for i, source in enumerate(sources):
+        try:
+            batch[len(ok)] = decode(source)
+            ok.append(i)
+        except Exception as e:
+            errors[i] = str(e)
+    return batch[:len(ok)], ok, errors
+
+
+# Run the model over the array in fixed-size micro-batches (prepare converts each chunk first)
+def _predict_in_batches(model, inputs, batch_size, prepare=None):
+    probabilities = []
+    for start in range(0, len(inputs), batch_size):
+        chunk = inputs[start:start + batch_size]
+        if prepare is not None:
+            chunk = prepare(chunk)
+        probabilities.append(np.asarray(model.predict_on_batch(chunk)))
+    return np.concatenate(probabilities, axis=0)
+
+
+# Label and per-class probabilities for one model output row
+def format_prediction(probs, labels):
+    return {
+        "label": labels[int(np.argmax(probs))],
+        "probabilities": {labels[i]: float(p) for i, p in enumerate(probs)},
+    }
+
+
+def _batch_results(model, sources, decode, shape, labels, batch_size, dtype=np.float32, prepare=None):
+    inputs, ok, errors = _decode_all(sources, decode, shape, dtype)
+
+    # Results are returned in the order of sources, failures included
+    results = [None] * len(sources)
+    probabilities = _predict_in_batches(model, inputs, batch_size, prepare) if ok else []
+    for i, probs in zip(ok, probabilities):
+        results[i] = {"file": source_name(sources[i]), **format_prediction(probs, labels)}
+    for i, error in errors.items():
+        results[i] = {"file": source_name(sources[i]), "label": None, "probabilities": None, "error": error}
+    return results
+
+
+# Batch prediction for MRI images: a list of paths/files or a directory. Images are kept
+# as uint8 and scaled one micro-batch at a time into a single reused float32 buffer, unless
+# the model takes uint8 pixels itself (load_mri_runtime(uint8_input=True)).
+def predict_mri_batch(model, sources, batch_size=BATCH_SIZE):
+    sources = collect_files(sources, MRI_EXTENSIONS)
+    prepare = None
+    if getattr(model, "input_dtype", np.float32) != np.uint8:
+        buffer = np.empty((batch_size,) + IMAGE_SIZE + (3,), dtype=np.float32)
+        prepare = lambda chunk: scale_pixels(chunk, out=buffer[:len(chunk)])
+    return _batch_results(model, sources, load_mri_pixels, IMAGE_SIZE + (3,),
+                          mri_labels, batch_size, np.uint8, prepare)
+
+
+# Batch prediction for audio clips: a list of paths/files or a directory
+def predict_audio_batch(model, sources, batch_size=BATCH_SIZE):
+    sources = collect_files(sources, AUDIO_EXTENSIONS)
+    return _batch_results(model, sources, load_audio_features, (N_MFCC,),
+                          audio_labels, batch_size)
@@ -0,0 +1,210 @@
+"""Concurrent-session load test.
+
+Ramps the number of simulated clinicians and reports, per concurrency level,
+p50/p99 latency, error rate, throughput and server memory. It also names the
+first level at which the system saturates: p99 above --slo-ms, more than 1%
+errors, or less than 10% extra throughput over the previous level.
+
+http mode (default) drives server.py, the same inference path the Streamlit app
+uses when AUTISM_INFERENCE_URL is set. Each session uploads a synthetic MRI
+image and then a synthetic audio clip, as pressing "Predict MRI" and
+"Predict Audio" would. With --start-server a local server is started with the
+prediction cache disabled, so every request reaches the models:
+
+    python loadtest.py --start-server --sessions 1 5 10 25 50 --duration 30
+
+app mode runs app.py headlessly with Streamlit's AppTest, one instance per
+session, and submits the quiz over and over. It measures the per-interaction
+script cost of the UI itself. AppTest cannot drive st.file_uploader, so model
+predictions are only load-tested in http mode:
+
+    python loadtest.py --mode app --sessions 1 5 10 --duration 30
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from urllib.request import urlopen
+
+import numpy as np
+
+from benchmark import synthetic_jpeg, synthetic_wav
+from client import InferenceClient
+from server import DEFAULT_PORT
+from sysinfo import memory_mb
+
+QUIZ_BUTTON = "Submit Autism Quiz"
+
+
+# Collects request latencies and errors from all session threads of one level
+class Recorder:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds, ok):
+        with self._lock:
+            self.latencies.append(seconds)
+            if not ok:
+                self.errors += 1
+
+
+def _timed_call(recorder, fn, *args):
+    start = time.perf_counter()
+    try:
+        fn(*args)
+    except Exception:
+        recorder.record(time.perf_counter() - start, False)
+    else:
+        recorder.record(time.perf_counter() - start, True)
+
+
+def http_session(client, images, clips, session, recorder, stop_at):
+    i = session
+    while time.perf_counter() < stop_at:
+        _timed_call(recorder, client.predict_mri, images[i % len(images)], f"session{session}.jpg")
+        _timed_call(recorder, client.predict_audio, clips[i % len(clips)], f"session{session}.wav")
+        i += 1
+
+
+def app_session(app_path, session, recorder, stop_at, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(app_path, default_timeout=timeout)
+    _timed_call(recorder, app.run)
+    while time.perf_counter() < stop_at:
+        def submit():
+            next(b for b in app.button if b.label == QUIZ_BUTTON).click().run()
+            if app.exception:
+                raise RuntimeError(app.exception[0].message)
+        _timed_call(recorder, submit)
+
+
+def run_level(sessions, duration, target, memory):
+    recorder = Recorder()
+    start = time.perf_counter()
+    stop_at = start + duration
+    threads = [threading.Thread(target=target, args=(n, recorder, stop_at), daemon=True)
+               for n in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array(recorder.latencies) * 1000
+    requests = len(latencies)
+    p50, p99 = np.percentile(latencies, [50, 99]) if requests else (float("nan"),) * 2
+    return {
+        "sessions": sessions,
+        "requests": requests,
+        "error_rate": recorder.errors / requests if requests else 0.0,
+        "p50_ms": float(p50),
+        "p99_ms": float(p99),
+        "throughput_per_s": (requests - recorder.errors) / elapsed,
+        "memory_mb": memory(),
+    }
+
+
+# First level that breaks the latency SLO, errors out or stops scaling throughput
+def saturation_point(levels, slo_ms, max_error_rate=0.01, min_gain=0.10):
+    previous = None
+    for level in levels:
+        if level["p99_ms"] > slo_ms:
+            return level["sessions"], f"p99 {level['p99_ms']:.0f} ms > {slo_ms:.0f} ms"
+        if level["error_rate"] > max_error_rate:
+            return level["sessions"], f"error rate {level['error_rate']:.1%}"
+        if previous and level["throughput_per_s"] < previous["throughput_per_s"] * (1 + min_gain):
+            return level["sessions"], (f"throughput {level['throughput_per_s']:.1f}/s vs "
+                                       f"{previous['throughput_per_s']:.1f}/s at {previous['sessions']} sessions")
+        previous = level
+    return None, "not reached"
+
+
+def start_server(port):
+    env = dict(os.environ, AUTISM_CACHE_MAX_MB="0")
+    env.pop("AUTISM_CACHE_DIR", None)
+    process = subprocess.Popen([sys.executable, "server.py", "--port", str(port)], env=env,
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.perf_counter() + 600  # model loading can take minutes on a cold machine
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"server.py exited with code {process.returncode}")
+        try:
+            with urlopen(f"{url}/health", timeout=2):
+                return process, url
+        except OSError:
+            time.sleep(1)
+    process.terminate()
+    raise SystemExit("server.py did not become healthy within 10 minutes")
+
+
+def server_memory(url):
+    try:
+        with urlopen(f"{url}/health", timeout=10) as response:
+            return json.loads(response.read())["models"].get("memory_mb")
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ramp concurrent sessions and find the saturation point")
+    parser.add_argument("--mode", choices=["http", "app"], default="http")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 5, 10, 25, 50])
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per concurrency level")
+    parser.add_argument("--slo-ms", type=float, default=2000.0, help="p99 latency budget per request")
+    parser.add_argument("--url", default=f"http://127.0.0.1:{DEFAULT_PORT}", help="http mode: server.py URL")
+    parser.add_argument("--start-server", action="store_true", help="http mode: start server.py locally")
+    parser.add_argument("--pool-size", type=int, default=64, help="distinct synthetic files per kind")
+    parser.add_argument("--image-size", type=int, nargs=2, default=[512, 512], metavar=("W", "H"))
+    parser.add_argument("--audio-seconds", type=float, default=5.0)
+    parser.add_argument("--app", default="app.py", help="app mode: Streamlit script")
+    parser.add_argument("--timeout", type=float, default=120.0, help="app mode: seconds per script run")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = None
+    if args.mode == "http":
+        if args.start_server:
+            server, args.url = start_server(int(args.url.rsplit(":", 1)[1]))
+        rng = np.random.default_rng(args.seed)
+        images = [synthetic_jpeg(rng, args.image_size) for _ in range(args.pool_size)]
+        clips = [synthetic_wav(rng, args.audio_seconds, 44100) for _ in range(args.pool_size)]
+        client = InferenceClient(args.url)
+        target = lambda n, recorder, stop_at: http_session(client, images, clips, n, recorder, stop_at)
+        memory = lambda: server_memory(args.url)
+    else:
+        target = lambda n, recorder, stop_at: app_session(args.app, n, recorder, stop_at, args.timeout)
+        memory = memory_mb
+
+    levels = []
+    try:
+        for sessions in args.sessions:
+            level = run_level(sessions, args.duration, target, memory)
+            levels.append(level)
+            rss = (level["memory_mb"] or {}).get("rss")
+            print(f"sessions={sessions:<4} {level['throughput_per_s']:8.1f} req/s  "
+                  f"p50 {level['p50_ms']:8.1f} ms  p99 {level['p99_ms']:8.1f} ms  "
+                  f"errors {level['error_rate']:6.1%}  rss {rss or 0:8.0f} MB", flush=True)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    sessions, reason = saturation_point(levels, args.slo_ms)
+    print(f"saturation: {sessions} sessions ({reason})" if sessions else "saturation: not reached")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), "levels": levels,
+                       "saturation": {"sessions": sessions, "reason": reason}}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""Process-wide latency and resource metrics.
+
+Counters, gauges and histograms live in one registry and are exposed in the
+Prometheus text format (server.py serves them on /metrics; the Streamlit app
+can start a small exporter with AUTISM_METRICS_PORT). Stage timings are also
+written as one-line JSON logs on the "autism.metrics" logger:
+
+    with timed("decode", pipeline="mri"):
+        img = Image.open(...)
+
+Profiling is off by default and switched on per request with profiled().
+"""
+import contextvars
+import io
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sysinfo import rss_mb
+
+logger = logging.getLogger("autism.metrics")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name, self.help = name, help_text
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, (), value) for key, value in self.values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self.values[_label_key(labels)] = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name, self.help = name, help_text
+        self.buckets = tuple(buckets)
+        self.values = {}  # key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            state = self.values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    # Sum of every observed value for these labels
+    def total(self, **labels):
+        with self._lock:
+            state = self.values.get(_label_key(labels))
+            return state[-2] if state else 0.0
+
+    def samples(self):
+        out = []
+        with self._lock:
+            for key, state in self.values.items():
+                for bound, count in zip(self.buckets, state):
+                    out.append((f"{self.name}_bucket", key, (("le", bound),), count))
+                out.append((f"{self.name}_bucket", key, (("le", "+Inf"),), state[-1]))
+                out.append((f"{self.name}_sum", key, (), state[-2]))
+                out.append((f"{self.name}_count", key, (), state[-1]))
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help_text, *args):
+        with self._lock:
+            if name not in self.metrics:
+                self.metrics[name] = cls(name, help_text, *args)
+            return self.metrics[name]
+
+    def counter(self, name, help_text=""):
+        return self._get(Counter, name, help_text)
+
+    def gauge(self, name, help_text=""):
+        return self._get(Gauge, name, help_text)
+
+    def histogram(self, name, help_text="", buckets=LATENCY_BUCKETS):
+        return self._get(Histogram, name, help_text, buckets)
+
+    # Prometheus text exposition format
+    def render(self):
+        process_rss.set(rss_mb() or 0)
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, key, extra, value in metric.samples():
+                lines.append(f"{name}{_format_labels(key, extra)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+stage_seconds = REGISTRY.histogram("autism_stage_seconds", "Time spent in each pipeline stage")
+stage_errors = REGISTRY.counter("autism_stage_errors_total", "Exceptions raised per pipeline stage")
+model_load_seconds = REGISTRY.histogram("autism_model_load_seconds", "Time to load a model")
+cache_requests = REGISTRY.counter("autism_cache_requests_total", "Prediction cache lookups by result")
+batch_size = REGISTRY.histogram("autism_batch_size", "Samples per model forward pass", SIZE_BUCKETS)
+queue_depth = REGISTRY.gauge("autism_queue_depth", "Requests waiting for a micro-batch")
+process_rss = REGISTRY.gauge("autism_process_rss_megabytes", "Resident memory of this process")
+
+
+# Times a block into autism_stage_seconds{stage=..., **labels}, counts errors and logs one JSON line
+@contextmanager
+def timed(stage, **labels):
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        stage_errors.inc(stage=stage, **labels)
+        logger.warning(json.dumps({"event": "stage_error", "stage": stage, "error": str(e), **labels}))
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_seconds.observe(elapsed, stage=stage, **labels)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(json.dumps({"event": "stage", "stage": stage, "seconds": round(elapsed, 6), **labels}))
+
+
+# Times a model load into autism_model_load_seconds{model=...} and logs it
+@contextmanager
+def timed_load(model):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        model_load_seconds.observe(elapsed, model=model)
+        logger.info(json.dumps({"event": "model_load", "model": model, "seconds": round(elapsed, 3)}))
+
+
+_active_profile = contextvars.ContextVar("autism_active_profile", default=None)
+
+
+# The profiled() result of the request running in this context, or None. Work done for the
+# request on other threads (the micro-batcher's forward pass) adds its own report to
+# its "parts" list, since a profiler only sees the thread it was started on.
+def active_profile():
+    return _active_profile.get()
+
+
+@contextmanager
+def _profile_thread(result):
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        import cProfile
+        import pstats
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+ allows one cProfile per process, and it already sees every thread
+            yield
+            return
+        try:
+            yield
+        finally:
+            profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(30)
+            result["report"] = out.getvalue()
+        return
+
+    profiler = Profiler(interval=0.001)
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        result["report"] = profiler.output_text()
+
+
+# Profiles the enclosed block when enabled. Uses the pyinstrument sampling profiler
+# if it is installed, cProfile otherwise; the text report is put in result["report"],
+# followed by the reports other threads attached for this request.
+@contextmanager
+def profiled(enabled=True):
+    result = {"report": None, "parts": []}
+    if not enabled:
+        yield result
+        return
+    token = _active_profile.set(result)
+    try:
+        with _profile_thread(result):
+            yield result
+    finally:
+        _active_profile.reset(token)
+        for title, report in list(result["parts"]):
+            result["report"] = f"{result['report'] or ''}\n\n=== {title} ===\n{report}"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+# Standalone /metrics exporter for processes that have no HTTP server of their own (the Streamlit app)
+def start_metrics_server(port=None, host="0.0.0.0"):
+    port = int(port or os.environ.get("AUTISM_METRICS_PORT", 0))
+    if not port:
+        return None
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
@@ -0,0 +1,236 @@
+"""Node-wide registry of model weights shared read-only by every worker process.
+
+Each Streamlit process, server process or pool worker used to read its own copy
+of the weights. The registry writes them once per model version, by default
+into /dev/shm/autism-models, and workers map that copy instead. The kernel
+keeps a single set of pages in RAM no matter how many workers attach.
+
+    registry = ModelRegistry()
+    model = registry.load_audio()          # NumpyMLP over np.memmap views, no copy
+    model = registry.load_mri_tflite()     # TFLite interpreter on the mmapped .tflite
+    print(registry.memory_report())        # RSS / PSS of every attached process
+
+What can be shared depends on the runtime:
+
+- audio_classification_model.h5 is stored as one flat float32 file. NumpyMLP
+  (audio_runtime.py) multiplies directly with memmap views of it.
+- TFLite maps its model file instead of reading it, so a .tflite export of BC.h5
+  (export_mri.py) is shared as is. XNNPACK would repack the weights into private
+  memory in every process, so shared interpreters use the builtin kernels unless
+  AUTISM_SHARED_XNNPACK=1, which trades memory for speed.
+- Keras/TensorFlow copies weights into its own tensors, so BC.h5 itself cannot be
+  shared; serve the TFLite export instead.
+
+Entries are named after the model fingerprint used by the prediction cache, so a
+retrained model gets a new entry. The first process to publish a version writes
+it to a temporary folder and renames it into place; concurrent publishers don't
+corrupt each other.
+
+python model_registry.py publish audio_classification_model.h5 BC.tflite
+python model_registry.py status
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from prediction_cache import model_fingerprint
+from sysinfo import memory_mb
+
+REGISTRY_DIR = os.environ.get("AUTISM_MODEL_REGISTRY") or os.path.join(
+    "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "autism-models")
+SHARED_WEIGHTS = os.environ.get("AUTISM_SHARED_WEIGHTS", "0") == "1"
+SHARED_XNNPACK = os.environ.get("AUTISM_SHARED_XNNPACK", "0") == "1"
+
+ALIGNMENT = 64  # byte alignment of every array in weights.bin
+
+
+# psutil if installed; otherwise signal 0 on POSIX. On Windows os.kill(pid, 0) would send
+# CTRL_C_EVENT, so without psutil every pid is assumed alive there (stale entries are kept).
+def _pid_alive(pid):
+    try:
+        import psutil
+        return psutil.pid_exists(pid)
+    except ImportError:
+        pass
+    if os.name != "posix":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _write_dense(model_path, folder):
+    from audio_runtime import read_dense_layers
+
+    try:
+        layers = read_dense_layers(model_path)
+    except ValueError as e:
+        raise ValueError(f"{model_path} cannot be shared: only Dense-only .h5 models (the audio MLP) and "
+                         f".tflite files are supported. Keras copies weights into TensorFlow's own "
+                         f"buffers, so export BC.h5 with export_mri.py and share the .tflite file ({e})")
+
+    manifest = {"kind": "dense", "file": "weights.bin", "layers": []}
+    offset = 0
+    with open(os.path.join(folder, "weights.bin"), "wb") as f:
+        def put(array):
+            nonlocal offset
+            pad = -offset % ALIGNMENT
+            f.write(b"\0" * pad)
+            offset += pad
+            entry = {"offset": offset, "shape": list(array.shape)}
+            data = np.ascontiguousarray(array, dtype=np.float32).tobytes()
+            f.write(data)
+            offset += len(data)
+            return entry
+
+        for kernel, bias, activation in layers:
+            manifest["layers"].append({"kernel": put(kernel), "bias": put(bias), "activation": activation})
+    return manifest
+
+
+class ModelRegistry:
+    def __init__(self, root=REGISTRY_DIR):
+        self.root = root
+
+    def entry(self, model_path):
+        name = os.path.splitext(os.path.basename(model_path))[0]
+        return os.path.join(self.root, f"{name}-{model_fingerprint(model_path)}")
+
+    # Write one shared copy of the model (no-op when this version is already published)
+    def publish(self, model_path):
+        entry = self.entry(model_path)
+        if os.path.exists(os.path.join(entry, "manifest.json")):
+            return entry
+
+        os.makedirs(self.root, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=".publish-", dir=self.root)
+        try:
+            if model_path.lower().endswith(".tflite"):
+                shutil.copyfile(model_path, os.path.join(tmp, "model.tflite"))
+                manifest = {"kind": "file", "file": "model.tflite"}
+            else:
+                manifest = _write_dense(model_path, tmp)
+            manifest["source"] = os.path.abspath(model_path)
+            with open(os.path.join(tmp, "manifest.json"), "w") as f:
+                json.dump(manifest, f, indent=2)
+            os.makedirs(os.path.join(tmp, "pids"))
+            try:
+                os.rename(tmp, entry)
+            except OSError:
+                if not os.path.exists(os.path.join(entry, "manifest.json")):
+                    raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        # Older versions of the same model are no longer needed once nobody is attached
+        prefix = os.path.basename(entry).rsplit("-", 1)[0] + "-"
+        for other in os.listdir(self.root):
+            stale = os.path.join(self.root, other)
+            if other.startswith(prefix) and stale != entry and not self._attached_pids(stale):
+                shutil.rmtree(stale, ignore_errors=True)
+        return entry
+
+    # Publish if needed, record this process as a user and return (entry folder, manifest)
+    def attach(self, model_path):
+        entry = self.publish(model_path)
+        with open(os.path.join(entry, "manifest.json")) as f:
+            manifest = json.load(f)
+        open(os.path.join(entry, "pids", str(os.getpid())), "w").close()
+        return entry, manifest
+
+    def load_audio(self, model_path=None):
+        from audio_runtime import NumpyMLP
+        from inference import AUDIO_MODEL_PATH
+
+        entry, manifest = self.attach(model_path or AUDIO_MODEL_PATH)
+        weights = np.memmap(os.path.join(entry, manifest["file"]), dtype=np.float32, mode="r")
+
+        def view(spec):
+            start = spec["offset"] // 4
+            return weights[start:start + int(np.prod(spec["shape"]))].reshape(spec["shape"])
+
+        return NumpyMLP([(view(layer["kernel"]), view(layer["bias"]), layer["activation"])
+                         for layer in manifest["layers"]])
+
+    def load_mri_tflite(self, model_path=None, num_threads=None, use_xnnpack=SHARED_XNNPACK):
+        from mri_runtime import NUM_THREADS, TFLiteModel, mri_runtime_path
+
+        entry, manifest = self.attach(model_path or mri_runtime_path("tflite"))
+        return TFLiteModel(os.path.join(entry, manifest["file"]), num_threads or NUM_THREADS,
+                           use_xnnpack=use_xnnpack)
+
+    def _attached_pids(self, entry):
+        try:
+            names = os.listdir(os.path.join(entry, "pids"))
+        except OSError:
+            return []
+        pids = []
+        for name in names:
+            if _pid_alive(int(name)):
+                pids.append(int(name))
+            else:
+                try:
+                    os.remove(os.path.join(entry, "pids", name))
+                except OSError:
+                    pass
+        return pids
+
+    # Size of every published model, the processes attached to it and their memory use.
+    # "total_pss_mb" is what all attached workers really cost together.
+    def memory_report(self):
+        models, processes = [], {}
+        if os.path.isdir(self.root):
+            for name in sorted(os.listdir(self.root)):
+                entry = os.path.join(self.root, name)
+                if name.startswith(".") or not os.path.isdir(entry):
+                    continue
+                size = sum(os.path.getsize(os.path.join(entry, f)) for f in os.listdir(entry)
+                           if os.path.isfile(os.path.join(entry, f)))
+                pids = self._attached_pids(entry)
+                models.append({"model": name, "size_mb": size / 2**20, "processes": pids})
+                for pid in pids:
+                    processes.setdefault(pid, memory_mb(pid))
+        return {
+            "registry": self.root,
+            "models": models,
+            "processes": [{"pid": pid, **usage} for pid, usage in sorted(processes.items())],
+            "total_rss_mb": sum(p["rss"] or 0 for p in processes.values()),
+            "total_pss_mb": sum(p["pss"] or 0 for p in processes.values()),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish model weights for sharing between workers")
+    parser.add_argument("--root", default=REGISTRY_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    publish = commands.add_parser("publish", help="write shared copies of these model files")
+    publish.add_argument("models", nargs="+")
+    commands.add_parser("status", help="published models, attached processes and their memory")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == "publish":
+        for model in args.models:
+            print(f"{model} -> {registry.publish(model)}")
+        return
+
+    report = registry.memory_report()
+    print(f"registry: {report['registry']}")
+    for model in report["models"]:
+        print(f"  {model['model']:<50} {model['size_mb']:8.1f} MB  pids {model['processes']}")
+    for p in report["processes"]:
+        print(f"  pid {p['pid']:<8} rss {p['rss'] or 0:8.1f} MB  pss {p['pss'] or 0:8.1f} MB  "
+              f"shared {p['shared'] or 0:8.1f} MB")
+    print(f"total rss {report['total_rss_mb']:.1f} MB, total pss {report['total_pss_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
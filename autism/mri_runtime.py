@@ -0,0 +1,112 @@
+import os
+import threading
+
+import numpy as np
+
+from inference import MRI_MODEL_PATH, PIXEL_SCALE, scale_pixels
+
+# Which runtime serves the MRI model: keras (BC.h5 behind serving.ServingModel), tflite or onnx (files written by export_mri.py)
+MRI_BACKEND = os.environ.get("AUTISM_MRI_BACKEND", "keras").lower()
+MRI_RUNTIME_PATH = os.environ.get("AUTISM_MRI_RUNTIME_PATH")
+NUM_THREADS = int(os.environ.get("AUTISM_MRI_THREADS", os.cpu_count() or 1))
+
+DEFAULT_RUNTIME_FILES = {
+    "keras": MRI_MODEL_PATH,
+    "tflite": os.path.splitext(MRI_MODEL_PATH)[0] + ".tflite",
+    "onnx": os.path.splitext(MRI_MODEL_PATH)[0] + ".onnx",
+}
+
+
+# Model file used by a backend (also what the prediction cache fingerprints)
+def mri_runtime_path(backend=MRI_BACKEND, path=MRI_RUNTIME_PATH):
+    if backend not in DEFAULT_RUNTIME_FILES:
+        raise ValueError(f"Unknown MRI backend {backend!r}, expected one of {sorted(DEFAULT_RUNTIME_FILES)}")
+    return path or DEFAULT_RUNTIME_FILES[backend]
+
+
+# TFLite interpreter (XNNPACK is the default CPU delegate) behind the Keras predict_on_batch API.
+# use_xnnpack=False keeps the builtin kernels, which read weights straight from the mmapped file.
+class TFLiteModel:
+    def __init__(self, path, num_threads=NUM_THREADS, use_xnnpack=True):
+        import tensorflow as tf
+
+        options = {}
+        if not use_xnnpack:
+            options["experimental_op_resolver_type"] = \
+                tf.lite.experimental.OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+        self.interpreter = tf.lite.Interpreter(model_path=path, num_threads=num_threads, **options)
+        self.input_index = self.interpreter.get_input_details()[0]["index"]
+        self.output_index = self.interpreter.get_output_details()[0]["index"]
+        self.batch_size = None
+        self._lock = threading.Lock()
+
+    def predict_on_batch(self, batch):
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        with self._lock:
+            if batch.shape[0] != self.batch_size:
+                self.interpreter.resize_tensor_input(self.input_index, batch.shape)
+                self.interpreter.allocate_tensors()
+                self.batch_size = batch.shape[0]
+            self.interpreter.set_tensor(self.input_index, batch)
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self.output_index).copy()
+
+    predict = predict_on_batch
+
+
+# ONNX Runtime session behind the Keras predict_on_batch API
+class OnnxModel:
+    def __init__(self, path, num_threads=NUM_THREADS):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict_on_batch(self, batch):
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        return self.session.run(None, {self.input_name: batch})[0]
+
+    predict = predict_on_batch
+
+
+# Feeds uint8 pixel batches to a float32 model: one fused cast-and-scale into a buffer
+# that is reused across calls instead of allocating a float batch per request
+class ScaledInput:
+    input_dtype = np.uint8
+
+    def __init__(self, model):
+        self.model = model
+        self._buffer = None
+        self._lock = threading.Lock()
+
+    def predict_on_batch(self, pixels):
+        pixels = np.asarray(pixels)
+        with self._lock:
+            if self._buffer is None or len(self._buffer) < len(pixels) or self._buffer.shape[1:] != pixels.shape[1:]:
+                self._buffer = np.empty(pixels.shape, dtype=np.float32)
+            batch = scale_pixels(pixels, out=self._buffer[:len(pixels)])
+            return np.asarray(self.model.predict_on_batch(batch))
+
+    predict = predict_on_batch
+
+
+# uint8_input=True returns a model that takes (n, 224, 224, 3) uint8 pixels (load_mri_pixels);
+# for compiled Keras models the scaling then runs inside the tf.function
+def load_mri_runtime(backend=MRI_BACKEND, path=MRI_RUNTIME_PATH, num_threads=NUM_THREADS, uint8_input=False):
+    path = mri_runtime_path(backend, path)
+    if backend == "tflite":
+        from model_registry import SHARED_WEIGHTS, ModelRegistry
+        if SHARED_WEIGHTS:
+            model = ModelRegistry().load_mri_tflite(path, num_threads)
+        else:
+            model = TFLiteModel(path, num_threads)
+    elif backend == "onnx":
+        model = OnnxModel(path, num_threads)
+    else:
+        from serving import SERVING_COMPILED, load_serving_model
+        if uint8_input and SERVING_COMPILED:
+            return load_serving_model(path, input_scale=float(PIXEL_SCALE))
+        model = load_serving_model(path)
+    return ScaledInput(model) if uint8_input else model
@@ -0,0 +1,64 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+CELLS_PER_PAGE = 20
+MAX_CACHED_PAGES = 256
+MAX_CACHED_NOTEBOOKS = 32
+
+
+# Converts uploaded notebooks to HTML page by page (CELLS_PER_PAGE cells each) on a
+# small background pool. Parsed notebooks and rendered pages are cached by the
+# SHA-256 of the upload, so reruns and other sessions viewing the same notebook
+# never convert it twice, and a huge notebook only converts the pages actually viewed.
+class NotebookRenderer:
+    def __init__(self, cells_per_page=CELLS_PER_PAGE, max_cached_pages=MAX_CACHED_PAGES,
+                 workers=2):
+        self.cells_per_page = cells_per_page
+        self.max_cached_pages = max_cached_pages
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="notebook")
+        self._notebooks = OrderedDict()
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+
+    # Parse (once per content hash) and return (key, number of pages)
+    def open(self, data):
+        import nbformat
+
+        key = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if key in self._notebooks:
+                self._notebooks.move_to_end(key)
+                notebook = self._notebooks[key]
+            else:
+                notebook = nbformat.reads(bytes(data).decode("utf-8"), as_version=4)
+                self._notebooks[key] = notebook
+                while len(self._notebooks) > MAX_CACHED_NOTEBOOKS:
+                    self._notebooks.popitem(last=False)
+        pages = max(1, -(-len(notebook.cells) // self.cells_per_page))
+        return key, pages
+
+    def _render(self, notebook, page):
+        from nbconvert import HTMLExporter
+
+        start = page * self.cells_per_page
+        chunk = notebook.copy()
+        chunk.cells = notebook.cells[start:start + self.cells_per_page]
+        # HTMLExporter is not documented as thread-safe: one per call is cheap next to the conversion
+        body, _ = HTMLExporter().from_notebook_node(chunk)
+        return body
+
+    # Future with the HTML of one page; repeated calls share the same (cached) future
+    def render_page(self, key, page):
+        with self._lock:
+            cache_key = (key, page)
+            if cache_key in self._pages:
+                self._pages.move_to_end(cache_key)
+                return self._pages[cache_key]
+            notebook = self._notebooks[key]
+            future = self.pool.submit(self._render, notebook, page)
+            self._pages[cache_key] = future
+            while len(self._pages) > self.max_cached_pages:
+                self._pages.popitem(last=False)
+            return future
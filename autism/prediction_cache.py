@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+from metrics import cache_requests
+
+MAX_MEMORY_MB = float(os.environ.get("AUTISM_CACHE_MAX_MB", 64))
+CACHE_DIR = os.environ.get("AUTISM_CACHE_DIR")  # unset = memory only
+
+
+# Identifies one version of a model file; changes whenever the file is replaced or retrained
+def model_fingerprint(model_path):
+    st = os.stat(model_path)
+    identity = f"{os.path.abspath(model_path)}:{st.st_size}:{st.st_mtime_ns}"
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()[:16]
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+# Two-tier prediction cache keyed on (uploaded bytes, model fingerprint). The fingerprint
+# must be the one taken when the model in memory was loaded, not the current file's:
+# a model file replaced at runtime is not the model answering requests.
+# The memory tier is an LRU bounded by the approximate size of its entries; the
+# optional disk tier keeps one folder per model version and drops the folders of
+# older versions the first time a new fingerprint is seen.
+class PredictionCache:
+    def __init__(self, max_memory_mb=MAX_MEMORY_MB, cache_dir=CACHE_DIR):
+        self.max_bytes = int(max_memory_mb * 1024 * 1024)
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._known_dirs = set()
+        self.hits = 0
+        self.misses = 0
+
+    def _model_dir(self, model_path, fingerprint):
+        name = os.path.splitext(os.path.basename(model_path))[0]
+        path = os.path.join(self.cache_dir, f"{name}-{fingerprint}")
+        if path not in self._known_dirs:
+            os.makedirs(path, exist_ok=True)
+            for other in os.listdir(self.cache_dir):
+                stale = os.path.join(self.cache_dir, other)
+                if other.startswith(f"{name}-") and stale != path and os.path.isdir(stale):
+                    shutil.rmtree(stale, ignore_errors=True)
+            self._known_dirs.add(path)
+        return path
+
+    def _remember(self, key, result):
+        size = len(json.dumps(result)) + len(key)
+        if key in self._entries:
+            self._size -= self._entries.pop(key)[1]
+        self._entries[key] = (result, size)
+        self._size += size
+        while self._size > self.max_bytes and self._entries:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._size -= evicted
+
+    def get(self, data, model_path, fingerprint):
+        digest = content_hash(data)
+        key = f"{fingerprint}:{digest}"
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                cache_requests.inc(result="hit")
+                return self._entries[key][0]
+
+            if self.cache_dir:
+                path = os.path.join(self._model_dir(model_path, fingerprint), f"{digest}.json")
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        result = json.load(f)
+                except (OSError, ValueError):
+                    pass
+                else:
+                    self._remember(key, result)
+                    self.hits += 1
+                    cache_requests.inc(result="hit")
+                    return result
+
+            self.misses += 1
+            cache_requests.inc(result="miss")
+            return None
+
+    def put(self, data, model_path, fingerprint, result):
+        digest = content_hash(data)
+
+        with self._lock:
+            self._remember(f"{fingerprint}:{digest}", result)
+            if self.cache_dir:
+                path = os.path.join(self._model_dir(model_path, fingerprint), f"{digest}.json")
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(result, f)
+                os.replace(tmp_path, path)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "memory_bytes": self._size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_dir": self.cache_dir,
+            }
@@ -0,0 +1,155 @@
+"""PDF report generation with PyMuPDF (fitz).
+
+Each worker process builds the report template once (page size, logo, title,
+footer) and keeps it as PDF bytes; every report then opens a copy of that
+template and only writes its own text, so the logo is embedded and laid out
+once per worker instead of once per report. ReportEngine spreads reports over
+a process pool and yields them as they finish, so the caller can stream
+progress and downloads while the rest are still rendering.
+"""
+import io
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+LOGO_PATH = os.environ.get("AUTISM_REPORT_LOGO",
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), "autism_logo.png"))
+TITLE = "Autism Detection Report"
+SUBTITLE = "Deep Learning-Based Autism Behavior Monitoring and Educational Report Generation"
+DISCLAIMER = ("This report is generated by machine-learning models and is intended to support, "
+              "not replace, assessment by a qualified healthcare professional.")
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+MARGIN = 50
+NAVY = (0 / 255, 43 / 255, 91 / 255)
+LOGO_PIXELS = 240  # the logo is drawn 60 pt wide; 240 px is sharp at print resolution
+
+_template = None  # per-process template PDF bytes
+
+
+# The logo as a small PNG, or None when it can't be decoded. autism_logo.png is really a
+# 1024x1024 WebP file, which PyMuPDF does not read, so it goes through PIL first and is
+# shrunk to the size it is printed at; full size it made every report ~1 MB.
+def _logo_png(logo_path):
+    if not logo_path or not os.path.exists(logo_path):
+        return None
+    try:
+        from PIL import Image
+
+        with Image.open(logo_path) as img:
+            img.thumbnail((LOGO_PIXELS, LOGO_PIXELS))
+            buffer = io.BytesIO()
+            img.save(buffer, format="PNG")
+        return buffer.getvalue()
+    except Exception:
+        return None
+
+
+def _build_template(logo_path=LOGO_PATH):
+    import fitz
+
+    doc = fitz.open()
+    page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+    logo = _logo_png(logo_path)
+    if logo is not None:
+        page.insert_image(fitz.Rect(MARGIN, 40, MARGIN + 60, 100), stream=logo, keep_proportion=True)
+    page.insert_text((MARGIN + 75, 68), TITLE, fontname="hebo", fontsize=20, color=NAVY)
+    page.insert_text((MARGIN + 75, 88), SUBTITLE, fontname="helv", fontsize=8, color=(0.3, 0.3, 0.3))
+    page.draw_line((MARGIN, 110), (PAGE_WIDTH - MARGIN, 110), color=NAVY, width=1.5)
+    page.insert_textbox(fitz.Rect(MARGIN, PAGE_HEIGHT - 90, PAGE_WIDTH - MARGIN, PAGE_HEIGHT - 40),
+                        DISCLAIMER, fontname="helv", fontsize=8, color=(0.4, 0.4, 0.4))
+    return doc.tobytes()
+
+
+def init_worker(logo_path=LOGO_PATH):
+    global _template
+    _template = _build_template(logo_path)
+
+
+def _section(lines, heading, result):
+    lines.append(("hebo", 13, heading))
+    if not result:
+        lines.append(("helv", 11, "Not provided"))
+        return
+    if result.get("error"):
+        lines.append(("helv", 11, f"Error: {result['error']}"))
+        return
+    lines.append(("helv", 11, f"Predicted classification: {result['label']}"))
+    for label, p in (result.get("probabilities") or {}).items():
+        lines.append(("helv", 11, f"    {label}: {p:.1%}"))
+
+
+# One report as PDF bytes. record: {"patient", "mri", "audio", optional "fusion", "date"}
+# where each result is a {"label", "probabilities"} dict as returned by the prediction functions.
+def render_report(record):
+    import fitz
+
+    if _template is None:
+        init_worker()
+    doc = fitz.open("pdf", _template)
+    page = doc[0]
+
+    lines = [
+        ("hebo", 12, f"Subject: {record.get('patient', 'Unknown')}"),
+        ("helv", 10, f"Date: {record.get('date') or datetime.now().strftime('%Y-%m-%d %H:%M')}"),
+        ("helv", 11, ""),
+    ]
+    _section(lines, "MRI Scan Analysis", record.get("mri"))
+    lines.append(("helv", 11, ""))
+    _section(lines, "Audio-Based Detection", record.get("audio"))
+    if record.get("fusion"):
+        lines.append(("helv", 11, ""))
+        _section(lines, "Multimodal Diagnosis", record["fusion"])
+
+    y = 140
+    for fontname, fontsize, text in lines:
+        page.insert_text((MARGIN, y), text, fontname=fontname, fontsize=fontsize)
+        y += fontsize + 8
+    return doc.tobytes(garbage=1, deflate=True)
+
+
+def report_filename(record):
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in str(record.get("patient", "report")))
+    return f"{os.path.splitext(safe)[0] or 'report'}_report.pdf"
+
+
+class ReportEngine:
+    def __init__(self, workers=None, use_processes=True, logo_path=LOGO_PATH):
+        # Spawned, not forked: the Streamlit process holds TensorFlow and running threads
+        kwargs = {"mp_context": multiprocessing.get_context("spawn")} if use_processes else {}
+        executor = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        self.pool = executor(max_workers=workers or os.cpu_count(), initializer=init_worker,
+                             initargs=(logo_path,), **kwargs)
+
+    # Yields (record, pdf bytes) in completion order
+    def generate(self, records, chunksize=16):
+        records = list(records)
+        chunks = [records[i:i + chunksize] for i in range(0, len(records), chunksize)]
+        futures = {self.pool.submit(_render_many, chunk): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            yield from zip(futures[future], future.result())
+
+    def shutdown(self):
+        self.pool.shutdown()
+
+
+def _render_many(records):
+    return [render_report(record) for record in records]
+
+
+# Bundle (record, pdf) pairs into one ZIP download
+def zip_reports(reports):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+        used = set()
+        for record, pdf in reports:
+            name = report_filename(record)
+            base, n = name, 1
+            while name in used:
+                n += 1
+                name = base.replace("_report.pdf", f"_{n}_report.pdf")
+            used.add(name)
+            archive.writestr(name, pdf)
+    return buffer.getvalue()
@@ -0,0 +1,233 @@
+"""Offline bulk scoring of MRI images or audio clips.
+
+Walks directory trees (e.g. a TRAIN/TEST/VAL split, where the parent folder of
+every file is written as "folder") or reads a manifest with one path per line.
+Files are decoded and preprocessed on a process pool while the main process runs
+batched inference, and the results are streamed to CSV or Parquet:
+
+    python score.py "autsim mri/TEST" --kind mri --output test_scores.csv
+    python score.py --manifest clips.txt --kind audio --output audio_scores.parquet
+
+The output doubles as the checkpoint. Every finished batch is flushed to disk
+(CSV rows are appended and fsynced; Parquet is a folder of part files written
+atomically). Running the same command again skips every file already in the
+output, so an interrupted run over millions of files picks up where it stopped.
+Files that fail to decode are recorded with their error and are not retried.
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+from audio_features import AUDIO_EXTENSIONS, load_audio_features
+from inference import BATCH_SIZE, MRI_EXTENSIONS, audio_labels, load_mri_pixels, mri_labels
+
+KINDS = {
+    "mri": (MRI_EXTENSIONS, mri_labels),
+    "audio": (AUDIO_EXTENSIONS, audio_labels),
+}
+
+
+# Files under the roots (sorted, streamed while walking) or listed in a manifest
+def iter_sources(roots, manifest, extensions):
+    if manifest:
+        with open(manifest, encoding="utf-8") as f:
+            for line in f:
+                path = line.strip()
+                if path and not path.startswith("#"):
+                    yield path
+    for root in roots:
+        if os.path.isfile(root):
+            yield root
+            continue
+        for folder, dirs, names in os.walk(root):
+            dirs.sort()
+            for name in sorted(names):
+                if name.lower().endswith(extensions):
+                    yield os.path.join(folder, name)
+
+
+# Worker entry point: decode one chunk, never raises. MRI images stay uint8 to keep IPC small.
+def _decode_chunk(kind, paths):
+    decode = load_mri_pixels if kind == "mri" else load_audio_features
+    decoded = []
+    for path in paths:
+        try:
+            decoded.append((path, decode(path), None))
+        except Exception as e:
+            # One line per row keeps a torn CSV row detectable by its missing newline
+            decoded.append((path, None, " ".join(f"{type(e).__name__}: {e}".split())))
+    return decoded
+
+
+class CsvWriter:
+    def __init__(self, path, columns):
+        self.path, self.columns = path, columns
+
+    # Byte offset just past the last newline when the file ends in a row torn by a crash
+    def _torn_tail(self):
+        with open(self.path, "rb") as f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                step = min(65536, position)
+                position -= step
+                f.seek(position)
+                block = f.read(step)
+                newline = block.rfind(b"\n")
+                if newline >= 0:
+                    start = position + newline + 1
+                    return start if start < end else None
+            return 0 if end else None
+
+    # Files already recorded; a row torn by a crash is ignored and scored again
+    def done(self):
+        if not os.path.exists(self.path):
+            return set()
+        with open(self.path, newline="", encoding="utf-8") as f:
+            rows = list(islice(csv.reader(f), 1, None))
+        if rows and self._torn_tail() is not None:
+            rows.pop()
+        return {row[0] for row in rows if len(row) == len(self.columns)}
+
+    def write(self, rows):
+        if os.path.exists(self.path):
+            torn = self._torn_tail()
+            if torn is not None:
+                # Cut the torn row off so the next row doesn't continue it
+                with open(self.path, "r+b") as f:
+                    f.truncate(torn)
+        new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if new:
+                writer.writerow(self.columns)
+            writer.writerows([row.get(c, "") for c in self.columns] for row in rows)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class ParquetWriter:
+    def __init__(self, path, columns):
+        self.path, self.columns = path, columns
+        os.makedirs(path, exist_ok=True)
+        self.parts = len(self._part_files())
+
+    def _part_files(self):
+        return sorted(f for f in os.listdir(self.path) if f.startswith("part-") and f.endswith(".parquet"))
+
+    def done(self):
+        import pandas as pd
+
+        done = set()
+        for name in self._part_files():
+            done.update(pd.read_parquet(os.path.join(self.path, name), columns=["file"])["file"])
+        return done
+
+    def write(self, rows):
+        import pandas as pd
+
+        name = os.path.join(self.path, f"part-{self.parts:06d}.parquet")
+        pd.DataFrame(rows, columns=self.columns).to_parquet(f"{name}.tmp", index=False)
+        os.replace(f"{name}.tmp", name)
+        self.parts += 1
+
+
+def make_writer(path, columns):
+    if path.lower().endswith(".parquet"):
+        return ParquetWriter(path, columns)
+    return CsvWriter(path, columns)
+
+
+def load_model(kind):
+    if kind == "mri":
+        from mri_runtime import load_mri_runtime
+        return load_mri_runtime(uint8_input=True)
+    from audio_runtime import load_audio_runtime
+    return load_audio_runtime()
+
+
+def _rows(decoded, model, kind, labels):
+    ok = [(path, x) for path, x, error in decoded if error is None]
+    rows = [{"file": path, "folder": os.path.basename(os.path.dirname(path)), "error": error}
+            for path, _, error in decoded if error is not None]
+    if ok:
+        batch = np.stack([x for _, x in ok])
+        probabilities = np.asarray(model.predict_on_batch(batch))
+        for (path, _), probs in zip(ok, probabilities):
+            row = {"file": path, "folder": os.path.basename(os.path.dirname(path)),
+                   "label": labels[int(np.argmax(probs))], "error": ""}
+            row.update({f"p_{name}": float(p) for name, p in zip(labels.values(), probs)})
+            rows.append(row)
+    return rows
+
+
+def score(sources, kind, writer, workers=None, batch_size=BATCH_SIZE, progress=True):
+    labels = KINDS[kind][1]
+    done = writer.done()
+    pending = (path for path in sources if path not in done)
+
+    scored, start = 0, time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers)
+    in_flight = deque()
+    try:
+        # Keep a few chunks decoding ahead of the model so neither side waits on the other.
+        # The workers are started before the model is loaded, so they never fork TensorFlow.
+        for _ in range(2 * workers):
+            chunk = list(islice(pending, batch_size))
+            if not chunk:
+                break
+            in_flight.append(pool.submit(_decode_chunk, kind, chunk))
+        model = load_model(kind)
+
+        while in_flight:
+            decoded = in_flight.popleft().result()
+            chunk = list(islice(pending, batch_size))
+            if chunk:
+                in_flight.append(pool.submit(_decode_chunk, kind, chunk))
+
+            writer.write(_rows(decoded, model, kind, labels))
+            scored += len(decoded)
+            if progress:
+                rate = scored / (time.perf_counter() - start)
+                print(f"\rscored {scored} files ({len(done)} done before)  {rate:.1f} files/s",
+                      end="", file=sys.stderr, flush=True)
+    finally:
+        pool.shutdown(cancel_futures=True)
+        if progress:
+            print(file=sys.stderr)
+    return scored
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score directory trees or a manifest of files in bulk")
+    parser.add_argument("roots", nargs="*", help="folders (walked recursively) or files to score")
+    parser.add_argument("--manifest", help="text file with one path per line")
+    parser.add_argument("--kind", choices=sorted(KINDS), required=True)
+    parser.add_argument("--output", required=True, help="results .csv, or .parquet (a folder of parts)")
+    parser.add_argument("--workers", type=int, default=None, help="decode processes (default: all cores)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+    if not args.roots and not args.manifest:
+        parser.error("give at least one folder/file or --manifest")
+
+    extensions, labels = KINDS[args.kind]
+    columns = ["file", "folder", "label"] + [f"p_{name}" for name in labels.values()] + ["error"]
+    writer = make_writer(args.output, columns)
+    try:
+        scored = score(iter_sources(args.roots, args.manifest, extensions), args.kind, writer,
+                       args.workers, args.batch_size)
+    except KeyboardInterrupt:
+        sys.exit(f"Interrupted; rerun the same command to resume from {args.output}")
+    print(f"Scored {scored} files -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
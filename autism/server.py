@@ -0,0 +1,163 @@
+"""Headless inference server for the MRI and audio models.
+
+Run it next to the Streamlit app and point the UI at it:
+
+    python server.py --port 8600
+    AUTISM_INFERENCE_URL=http://127.0.0.1:8600 streamlit run app.py
+
+POST the raw bytes of one file to /predict/mri or /predict/audio and the
+server answers with JSON: {"file", "label", "probabilities"}. Add ?profile=1
+to get a profiler report for that request in "profile": the request thread,
+followed by the micro-batcher's forward pass of the batch it ran in. GET
+/metrics returns Prometheus metrics, GET /health the batcher and cache stats.
+"""
+import argparse
+import json
+import queue
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from audio_runtime import load_audio_runtime
+from batching import MAX_BATCH_SIZE, MAX_WAIT_MS, MicroBatcher
+from inference import (AUDIO_MODEL_PATH, as_file, audio_labels,
+                       format_prediction, load_audio_features, load_mri_pixels, mri_labels)
+from metrics import REGISTRY, profiled, timed, timed_load
+from model_registry import SHARED_WEIGHTS, ModelRegistry
+from mri_runtime import MRI_BACKEND, MRI_RUNTIME_PATH, load_mri_runtime, mri_runtime_path
+from prediction_cache import PredictionCache, model_fingerprint
+from sysinfo import memory_mb
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8600
+MAX_QUEUE = 256
+REQUEST_TIMEOUT = 120
+
+
+# Owns both models; concurrent requests are queued and micro-batched per model
+class InferenceWorker:
+    def __init__(self, mri_backend=MRI_BACKEND, mri_model_path=MRI_RUNTIME_PATH,
+                 audio_model_path=AUDIO_MODEL_PATH, max_queue=MAX_QUEUE,
+                 max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        mri_model_path = mri_runtime_path(mri_backend, mri_model_path)
+        # Taken before loading: the cache is keyed on the version in memory, not on the file
+        self.fingerprints = {"mri": model_fingerprint(mri_model_path),
+                             "audio": model_fingerprint(audio_model_path)}
+        with timed_load("mri"):
+            mri_model = load_mri_runtime(mri_backend, mri_model_path, uint8_input=True)
+        with timed_load("audio"):
+            audio_model = load_audio_runtime(path=audio_model_path)
+        self.batchers = {
+            "mri": MicroBatcher(mri_model, max_batch_size, max_wait_ms, max_queue, name="mri-batcher"),
+            "audio": MicroBatcher(audio_model, max_batch_size, max_wait_ms, max_queue,
+                                  name="audio-batcher"),
+        }
+        self.decoders = {"mri": load_mri_pixels, "audio": load_audio_features}
+        self.labels = {"mri": mri_labels, "audio": audio_labels}
+        self.model_paths = {"mri": mri_model_path, "audio": audio_model_path}
+        self.cache = PredictionCache()
+
+    # Decode on the request thread, then queue for the model; raises queue.Full when saturated
+    def predict(self, kind, data, name="upload", timeout=REQUEST_TIMEOUT):
+        cached = self.cache.get(data, self.model_paths[kind], self.fingerprints[kind])
+        if cached is not None:
+            return {"file": name, **cached}
+
+        try:
+            sample = self.decoders[kind](as_file(data, name))
+        except Exception as e:
+            return {"file": name, "label": None, "probabilities": None, "error": str(e)}
+
+        probs = self.batchers[kind].submit(sample).result(timeout=timeout)
+        prediction = format_prediction(probs, self.labels[kind])
+        self.cache.put(data, self.model_paths[kind], self.fingerprints[kind], prediction)
+        return {"file": name, **prediction}
+
+    def stats(self):
+        stats = {kind: batcher.stats() for kind, batcher in self.batchers.items()}
+        stats["cache"] = self.cache.stats()
+        stats["memory_mb"] = memory_mb()
+        if SHARED_WEIGHTS:
+            stats["shared_weights"] = ModelRegistry().memory_report()
+        return stats
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    worker = None
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/health":
+            self._send_json(200, {"status": "ok", "models": self.worker.stats()})
+        elif path == "/metrics":
+            body = REGISTRY.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        kind = {"/predict/mri": "mri", "/predict/audio": "audio"}.get(url.path)
+        if kind is None:
+            self._send_json(404, {"error": "not found"})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            self._send_json(400, {"error": "empty request body"})
+            return
+        data = self.rfile.read(length)
+        query = parse_qs(url.query)
+        name = query.get("name", ["upload"])[0]
+
+        try:
+            with profiled(query.get("profile", ["0"])[0] == "1") as profile:
+                with timed("total", pipeline=kind):
+                    result = self.worker.predict(kind, data, name)
+            if profile["report"]:
+                result = {**result, "profile": profile["report"]}
+        except queue.Full:
+            self._send_json(503, {"error": "inference queue is full, retry later"})
+            return
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+
+        status = 422 if result.get("error") else 200
+        self._send_json(status, result)
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, max_queue=MAX_QUEUE,
+          max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+    PredictionHandler.worker = InferenceWorker(max_queue=max_queue, max_batch_size=max_batch_size,
+                                               max_wait_ms=max_wait_ms)
+    server = ThreadingHTTPServer((host, port), PredictionHandler)
+    print(f"Serving /predict/mri and /predict/audio on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Autism detection inference server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-queue", type=int, default=MAX_QUEUE)
+    parser.add_argument("--max-batch-size", type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.max_queue, args.max_batch_size, args.max_wait_ms)
@@ -0,0 +1,104 @@
+"""Compiled serving wrappers for the Keras models.
+
+Keras predict()/predict_on_batch() build a data adapter per call and may retrace
+as the batch size changes. ServingModel instead calls the model through one
+tf.function with a fixed input signature, (None, 224, 224, 3) for BC.h5 and
+(None, 40) for the audio model, and runs a warmup pass at load time, so the
+first request is served at steady-state latency:
+
+    model = load_serving_model("BC.h5")
+    probs = model.predict_on_batch(batch)
+
+AUTISM_SERVING_XLA=1 compiles the graph with XLA. XLA compiles once per input
+shape, so batches are then padded up to the next size in SERVING_BUCKETS, and
+warmup goes through every bucket. AUTISM_TF_INTRA_OP_THREADS and
+AUTISM_TF_INTER_OP_THREADS set the TensorFlow thread pools (0 keeps TF's
+default); they only take effect if set before TensorFlow runs its first op.
+"""
+import logging
+import os
+import time
+
+import numpy as np
+
+logger = logging.getLogger("autism.serving")
+
+SERVING_COMPILED = os.environ.get("AUTISM_SERVING_COMPILED", "1") != "0"
+SERVING_XLA = os.environ.get("AUTISM_SERVING_XLA", "0") == "1"
+SERVING_BUCKETS = tuple(int(n) for n in os.environ.get("AUTISM_SERVING_BUCKETS", "1,2,4,8,16,32").split(","))
+INTRA_OP_THREADS = int(os.environ.get("AUTISM_TF_INTRA_OP_THREADS", 0))
+INTER_OP_THREADS = int(os.environ.get("AUTISM_TF_INTER_OP_THREADS", 0))
+
+
+# Set the TensorFlow thread pools; too late once TF has executed an op (logged, not raised)
+def configure_threads(intra_op=INTRA_OP_THREADS, inter_op=INTER_OP_THREADS):
+    import tensorflow as tf
+
+    try:
+        if intra_op:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+        if inter_op:
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+    except RuntimeError as e:
+        logger.warning("TensorFlow thread settings ignored: %s", e)
+
+
+# A Keras model behind one fixed-signature tf.function, with the predict_on_batch API.
+# With input_scale the signature takes uint8 and the cast-and-scale runs inside the graph.
+class ServingModel:
+    def __init__(self, model, jit_compile=SERVING_XLA, buckets=SERVING_BUCKETS, warmup=True,
+                 input_scale=None):
+        import tensorflow as tf
+
+        self.model = model
+        self.input_shape = tuple(model.input_shape[1:])
+        self.input_dtype = np.float32 if input_scale is None else np.uint8
+        self.jit_compile = jit_compile
+        self.buckets = tuple(sorted(buckets)) if jit_compile else ()
+        if input_scale is None:
+            forward = lambda x: model(x, training=False)
+        else:
+            forward = lambda x: model(tf.cast(x, tf.float32) * input_scale, training=False)
+        self._forward = tf.function(
+            forward,
+            input_signature=[tf.TensorSpec((None,) + self.input_shape, tf.as_dtype(self.input_dtype))],
+            jit_compile=jit_compile,
+        )
+        self.warmup_seconds = self.warmup() if warmup else None
+
+    # Smallest bucket holding n rows (n itself when larger than every bucket)
+    def _padded_size(self, n):
+        for size in self.buckets:
+            if size >= n:
+                return size
+        return n
+
+    def predict_on_batch(self, batch):
+        batch = np.ascontiguousarray(batch, dtype=self.input_dtype)
+        n = len(batch)
+        size = self._padded_size(n)
+        if size != n:
+            padded = np.zeros((size,) + batch.shape[1:], dtype=self.input_dtype)
+            padded[:n] = batch
+            batch = padded
+        return self._forward(batch).numpy()[:n]
+
+    predict = predict_on_batch
+
+    # Trace (and with XLA compile every bucket) before the first real request
+    def warmup(self):
+        start = time.perf_counter()
+        for size in self.buckets or (1,):
+            self.predict_on_batch(np.zeros((size,) + self.input_shape, dtype=self.input_dtype))
+        return time.perf_counter() - start
+
+
+# load_model(path, compile=False), wrapped in a warmed-up ServingModel unless AUTISM_SERVING_COMPILED=0
+def load_serving_model(path, compiled=SERVING_COMPILED, jit_compile=SERVING_XLA, input_scale=None):
+    configure_threads()
+    from keras.models import load_model
+
+    model = load_model(path, compile=False)
+    if not compiled:
+        return model
+    return ServingModel(model, jit_compile=jit_compile, input_scale=input_scale)
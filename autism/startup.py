@@ -0,0 +1,72 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Process-wide record of how long each startup stage took (imports, model loads, first render)
+_timings = {}
+_lock = threading.Lock()
+PROCESS_START = time.perf_counter()
+
+
+def record(stage, seconds):
+    with _lock:
+        _timings.setdefault(stage, seconds)
+
+
+@contextmanager
+def timed(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
+
+
+# Seconds since this module was first imported (i.e. since the app process started serving)
+def since_start():
+    return time.perf_counter() - PROCESS_START
+
+
+def report():
+    with _lock:
+        return [{"stage": stage, "seconds": round(seconds, 3)} for stage, seconds in _timings.items()]
+
+
+# Runs the heavy imports and model loads once, on a daemon thread, so the page is
+# served before TensorFlow is even imported. ready is set when every step finished.
+class Warmup:
+    def __init__(self, steps):
+        self.steps = steps
+        self.ready = threading.Event()
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        try:
+            for stage, step in self.steps:
+                with timed(stage):
+                    step()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.ready.set()
+
+
+# python startup.py -> cold-start cost of each heavy import and model load, measured in order
+if __name__ == "__main__":
+    import importlib
+
+    for module in ("streamlit", "numpy", "PIL.Image", "librosa", "tensorflow", "keras"):
+        with timed(f"import {module}"):
+            importlib.import_module(module)
+
+    from inference import AUDIO_MODEL_PATH, MRI_MODEL_PATH
+    from keras.models import load_model
+    for path in (MRI_MODEL_PATH, AUDIO_MODEL_PATH):
+        with timed(f"load {path}"):
+            load_model(path, compile=False)
+
+    for row in report():
+        print(f"{row['stage']:<45} {row['seconds']:>8.3f}s")
+    print(f"{'total':<45} {since_start():>8.3f}s")
@@ -0,0 +1,104 @@
+"""Windowed, streaming inference for long audio recordings.
+
+process_and_predict_audio decodes the whole clip and averages its MFCCs into a
+single vector, so a 30-minute session is held in memory and gets one label.
+stream_predict instead reads the file block by block, resamples each block to
+22.05 kHz as it arrives, and cuts it into sliding windows (5 s every 2.5 s by
+default). Each window gets the same mean-MFCC descriptor the model was trained
+on; windows are scored in batches and yielded as soon as they are ready, so
+memory stays bounded by one window plus one block regardless of duration.
+"""
+import numpy as np
+
+from audio_features import SAMPLE_RATE, as_file, decode_audio, mfcc_vector
+from inference import audio_labels, format_prediction
+
+WINDOW_SECONDS = 5.0
+HOP_SECONDS = 2.5
+MIN_TAIL_SECONDS = 1.0
+BLOCK_FRAMES = 65536
+BATCH_SIZE = 32
+
+
+# Mono float32 blocks at SAMPLE_RATE. soundfile streams the file and soxr resamples
+# statefully across blocks; formats libsndfile cannot stream fall back to a full decode.
+def iter_audio_blocks(source, sr=SAMPLE_RATE, block_frames=BLOCK_FRAMES):
+    import soundfile as sf
+    import soxr
+
+    source = as_file(source)
+    try:
+        f = sf.SoundFile(source)
+    except RuntimeError:
+        if hasattr(source, "seek"):
+            source.seek(0)
+        y, _ = decode_audio(source, sr)
+        for start in range(0, len(y), block_frames):
+            yield y[start:start + block_frames]
+        return
+
+    with f:
+        resampler = None if f.samplerate == sr else soxr.ResampleStream(f.samplerate, sr, 1, dtype="float32")
+        while True:
+            block = f.read(block_frames, dtype="float32", always_2d=True)
+            last = len(block) < block_frames
+            mono = block.mean(axis=1)
+            if resampler is not None:
+                mono = resampler.resample_chunk(mono, last=last)
+            if len(mono):
+                yield mono
+            if last:
+                break
+
+
+# (start_seconds, samples) sliding windows over a block stream
+def iter_windows(blocks, sr=SAMPLE_RATE, window_seconds=WINDOW_SECONDS, hop_seconds=HOP_SECONDS,
+                 min_tail_seconds=MIN_TAIL_SECONDS):
+    window, hop = int(window_seconds * sr), int(hop_seconds * sr)
+    buffer = np.empty(0, dtype=np.float32)
+    offset = 0  # absolute sample index of buffer[0]
+    emitted_until = 0  # absolute sample index up to which audio is covered by a window
+    for block in blocks:
+        buffer = np.concatenate([buffer, block])
+        while len(buffer) >= window:
+            yield offset / sr, buffer[:window]
+            emitted_until = offset + window
+            buffer = buffer[hop:]
+            offset += hop
+
+    # Score whatever is left at the end if it is long enough (or if the clip is shorter than a window)
+    uncovered = offset + len(buffer) - emitted_until
+    if len(buffer) and (emitted_until == 0 or uncovered >= min_tail_seconds * sr):
+        yield offset / sr, buffer
+
+
+# Yields one timeline entry per window, in order, as soon as its batch has been scored:
+# {"start", "end", "label", "probabilities"}
+def stream_predict(source, model, window_seconds=WINDOW_SECONDS, hop_seconds=HOP_SECONDS,
+                   batch_size=BATCH_SIZE, labels=audio_labels, sr=SAMPLE_RATE):
+    pending, features = [], []
+
+    def flush():
+        probs = np.asarray(model.predict_on_batch(np.stack(features)))
+        for (start, end), row in zip(pending, probs):
+            yield {"start": round(start, 3), "end": round(end, 3), **format_prediction(row, labels)}
+        pending.clear()
+        features.clear()
+
+    windows = iter_windows(iter_audio_blocks(source, sr), sr, window_seconds, hop_seconds)
+    for start, samples in windows:
+        pending.append((start, start + len(samples) / sr))
+        features.append(mfcc_vector(samples, sr))
+        if len(features) >= batch_size:
+            yield from flush()
+    if features:
+        yield from flush()
+
+
+# Clip-level result: window probabilities averaged, weighted by window duration
+def aggregate(timeline, labels=audio_labels):
+    if not timeline:
+        return None
+    weights = np.array([entry["end"] - entry["start"] for entry in timeline])
+    probs = np.array([[entry["probabilities"][labels[i]] for i in range(len(labels))] for entry in timeline])
+    return format_prediction(np.average(probs, axis=0, weights=weights), labels)
@@ -0,0 +1,64 @@
+import os
+import sys
+
+
+# Resident set size of this process in MB (Linux /proc, else psutil if installed)
+def rss_mb(pid=None):
+    pid = pid or os.getpid()
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / 2**20
+    except Exception:
+        return None
+
+
+# Peak RSS of this process in MB since it started, or since the last reset_peak_rss()
+def peak_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return rss_mb()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes everywhere else
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+# Restart peak_rss_mb() from the current RSS (Linux only); returns whether it worked
+def reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+# {"rss", "pss", "shared"} in MB for a process. PSS splits shared pages between the
+# processes mapping them, so summing it over workers gives their real total footprint.
+# Outside Linux only "rss" is filled in.
+def memory_mb(pid=None):
+    pid = pid or os.getpid()
+    fields = {"Rss:": "rss", "Pss:": "pss", "Shared_Clean:": "shared", "Shared_Dirty:": "shared"}
+    usage = {"rss": None, "pss": None, "shared": None}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if parts and parts[0] in fields:
+                    key = fields[parts[0]]
+                    usage[key] = (usage[key] or 0) + int(parts[1]) / 1024
+    except (OSError, ValueError):
+        usage["rss"] = rss_mb(pid)
+    return usage
@@ -0,0 +1,39 @@
+import os
+
+import numpy as np
+
+from feature_store import FeatureStore
+
+
+def _files(folder, names):
+    paths = []
+    for name in names:
+        path = folder / name
+        path.write_bytes(name.encode("utf-8"))
+        paths.append(str(path))
+    return paths
+
+
+# Row i of every file named "<i>.wav" is [i, i, i, i]
+def _compute(paths):
+    values = np.array([[float(os.path.basename(p).split(".")[0])] * 4 for p in paths], dtype=np.float32)
+    return values, {}
+
+
+def test_rows_appended_after_a_torn_write_stay_aligned(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    store = FeatureStore("test", (4,), np.float32, {"v": 1}, root=str(tmp_path / "store"))
+    first = _files(data, [f"{i}.wav" for i in range(5)])
+    store.update(first, _compute)
+
+    # A run killed in the middle of writing a row leaves part of it behind
+    with open(store.data_path, "ab") as f:
+        f.write(b"\x01" * 6)
+
+    second = _files(data, [f"{i}.wav" for i in range(5, 10)])
+    store = FeatureStore("test", (4,), np.float32, {"v": 1}, root=str(tmp_path / "store"))
+    kept, X = store.load(first + second, _compute)
+
+    assert kept == first + second
+    np.testing.assert_array_equal(X, np.repeat(np.arange(10, dtype=np.float32)[:, None], 4, axis=1))
@@ -0,0 +1,137 @@
+"""Train the BC.h5 classification head on cached VGG16 embeddings.
+
+autism.ipynb freezes every VGG16 layer, so only the Flatten -> Dense softmax
+head learns anything, yet model.fit pushes every image through the whole
+backbone in each of the 19 epochs. Here the frozen backbone runs once per image
+(and once per augmentation variant), the flattened 7x7x512 embeddings are kept
+in the feature store, and the head trains on those vectors in seconds. The
+result is written as a full VGG16 + head model, loadable by load_mri_model():
+
+    python train_mri_head.py \
+        --train-dir "D:/autism early sathyabhama/autism/autsim mri/TRAIN/" \
+        --test-dir "D:/autism early sathyabhama/autism/autsim mri/TEST/" \
+        --augment-variants 4 --output BC.h5
+"""
+import argparse
+import zlib
+
+import numpy as np
+
+from feature_store import STORE_ROOT, UPDATE_CHUNK, FeatureStore, list_mri_split
+from inference import IMAGE_SIZE, MRI_MODEL_PATH, load_mri_pixels
+
+EMBEDDING_SHAPE = (7 * 7 * 512,)  # VGG16 include_top=False output for 224x224, flattened
+# Same augmentation as train_datagen in autism.ipynb
+AUGMENTATION = {"shear_range": 0.2, "zoom_range": 0.2, "horizontal_flip": True}
+
+
+def build_backbone():
+    from keras.applications.vgg16 import VGG16
+
+    vgg = VGG16(input_shape=IMAGE_SIZE + (3,), weights='imagenet', include_top=False)
+    for layer in vgg.layers:
+        layer.trainable = False
+    return vgg
+
+
+# Embedding store for one augmentation variant (0 = the plain image, like test_datagen)
+def embedding_store(variant, seed, root=STORE_ROOT):
+    params = {"backbone": "vgg16-imagenet-notop", "rescale": 1 / 255, "variant": variant}
+    if variant:
+        params.update(AUGMENTATION, seed=seed)
+    return FeatureStore("vgg16", EMBEDDING_SHAPE, np.float32, params, root)
+
+
+def make_embedder(backbone, variant, seed, batch_size):
+    from tensorflow.keras.preprocessing.image import ImageDataGenerator
+
+    augmenter = ImageDataGenerator(**AUGMENTATION) if variant else None
+
+    def embed(paths):
+        images = np.empty((len(paths),) + IMAGE_SIZE + (3,), dtype=np.float32)
+        errors = {}
+        for i, path in enumerate(paths):
+            try:
+                images[i] = load_mri_pixels(path, draft=False)
+            except Exception as e:
+                errors[path] = f"{type(e).__name__}: {e}"
+                continue
+            if augmenter is not None:
+                # Seed per (file, variant) so a cached variant can be reproduced exactly
+                transform_seed = zlib.crc32(f"{path}:{variant}:{seed}".encode("utf-8"))
+                params = augmenter.get_random_transform(images[i].shape, seed=transform_seed)
+                images[i] = augmenter.apply_transform(images[i], params)
+        images /= 255.0
+        embeddings = backbone.predict(images, batch_size=batch_size, verbose=0)
+        return embeddings.reshape(len(paths), -1), errors
+
+    return embed
+
+
+# Images are embedded chunk_size at a time and each chunk is stored before the next is decoded,
+# so memory stays bounded and an interrupted run keeps what it already embedded
+def embed_split(backbone, split_dir, variants, seed, batch_size, root=STORE_ROOT, chunk_size=UPDATE_CHUNK):
+    paths, labels, classes = list_mri_split(split_dir)
+    label_of = dict(zip(paths, labels))
+    X, y = [], []
+    for variant in range(variants + 1):
+        store = embedding_store(variant, seed, root)
+        kept, embeddings = store.load(paths, make_embedder(backbone, variant, seed, batch_size), chunk_size)
+        X.append(embeddings)
+        y.append(np.array([label_of[p] for p in kept]))
+        print(f"{split_dir}: variant {variant} -> {len(kept)} embeddings")
+    return np.concatenate(X), np.concatenate(y), classes
+
+
+def build_head(n_classes):
+    from keras.layers import Dense, Input
+    from keras.models import Sequential
+
+    return Sequential([Input(EMBEDDING_SHAPE), Dense(n_classes, activation='softmax')])
+
+
+# Put the trained Dense layer back on top of the backbone: same graph as autism.ipynb
+def assemble_full_model(backbone, head, n_classes):
+    from keras.layers import Dense, Flatten
+    from keras.models import Model
+
+    x = Flatten()(backbone.output)
+    prediction = Dense(n_classes, activation='softmax')(x)
+    model = Model(inputs=backbone.input, outputs=prediction)
+    model.layers[-1].set_weights(head.layers[-1].get_weights())
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the MRI head on cached VGG16 embeddings")
+    parser.add_argument("--train-dir", required=True)
+    parser.add_argument("--test-dir", required=True)
+    parser.add_argument("--epochs", type=int, default=19)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--augment-variants", type=int, default=0,
+                        help="augmented copies of each training image to embed (0 = none)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--store", default=STORE_ROOT)
+    parser.add_argument("--chunk-size", type=int, default=UPDATE_CHUNK,
+                        help="images decoded and embedded before each write to the store")
+    parser.add_argument("--output", default=MRI_MODEL_PATH)
+    args = parser.parse_args()
+
+    backbone = build_backbone()
+    X_train, y_train, classes = embed_split(backbone, args.train_dir, args.augment_variants,
+                                            args.seed, args.batch_size, args.store, args.chunk_size)
+    X_test, y_test, _ = embed_split(backbone, args.test_dir, 0, args.seed, args.batch_size, args.store,
+                                    args.chunk_size)
+
+    head = build_head(len(classes))
+    head.compile(loss='sparse_categorical_crossentropy', optimizer='adam', metrics=['accuracy'])
+    head.fit(X_train, y_train, validation_data=(X_test, y_test), epochs=args.epochs,
+             batch_size=args.batch_size, shuffle=True)
+
+    model = assemble_full_model(backbone, head, len(classes))
+    model.save(args.output)
+    print(f"Saved {args.output} (classes: {dict(enumerate(classes))})")
+
+
+if __name__ == "__main__":
+    main()